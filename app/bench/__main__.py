@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.bench.fake_datamart import FakeDatamart, FakeDatamartOptions
+from app.bench.results import append_results, compare, git_revision, load_history
+from app.bench.suite import BENCHMARKS, BenchContext, database_available, run_benchmarks
+from app.config import settings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite against a local datamart stand-in.")
+    parser.add_argument("--only", action="append", choices=[b.name for b in BENCHMARKS])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--years", type=int, default=3, help="History size for gather, HG201 and read API benchmarks")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per stand-in response")
+    parser.add_argument("--rows-per-day", type=int, default=0, help="Padding rows per day in stand-in responses")
+    parser.add_argument("--output", default="benchmarks/results.jsonl")
+    parser.add_argument("--no-record", action="store_true", help="Compare only; do not append to --output")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Median slowdown reported as a regression")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    commit, dirty = git_revision()
+    options = FakeDatamartOptions(latency_ms=args.latency_ms, rows_per_day=args.rows_per_day)
+    with FakeDatamart(options) as datamart:
+        ctx = BenchContext(
+            datamart=datamart,
+            iterations=args.iterations,
+            years=args.years,
+            today=datetime.now(tz=ZoneInfo(settings.app_timezone)).date(),
+            db_available=database_available(),
+        )
+        results = run_benchmarks(ctx, args.only)
+
+    summaries = []
+    for result in results:
+        summary = result.summary()
+        if "median" in summary:
+            summary["params"] = {**summary["params"], "latency_ms": args.latency_ms, "rows_per_day": args.rows_per_day}
+        summaries.append(summary)
+
+    rows = compare(load_history(args.output), summaries, commit, args.threshold)
+    print(f"commit {commit}{' (dirty)' if dirty else ''}")
+    for row in rows:
+        if "skipped" in row:
+            print(f"{row['name']:<24} skipped: {row['skipped']}")
+            continue
+        line = f"{row['name']:<24} median {row['median'] * 1000:9.2f} ms  p95 {row['p95'] * 1000:9.2f} ms"
+        if "change" in row:
+            flag = "  REGRESSION" if row["regression"] else ""
+            line += f"  {row['change']:+.1%} vs {row['baseline_commit']}{flag}"
+        print(line)
+    if not args.no_record:
+        append_results(args.output, summaries, commit, dirty)
+    return 1 if any(row.get("regression") for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
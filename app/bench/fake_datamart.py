@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import threading
+import time as time_module
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from app.config import settings
+
+
+HG201_REPORT_NUMBER = 2511
+
+_FIXTURES_DIR = "app/tests/fixtures"
+
+
+@dataclass
+class FakeDatamartOptions:
+    """Behaviour of the stand-in datamart.
+
+    ``rows_per_day`` pads each day with extra rows to control response size.
+    Today's report is withheld until ``publish_at`` (market time) on
+    ``clock``, which lets load tests drive publication with a virtual clock.
+    """
+
+    latency_ms: float = 0.0
+    rows_per_day: int = 0
+    publish_at: Optional[time] = None
+    clock: Callable[[], datetime] = field(default=lambda: datetime.now(tz=ZoneInfo(settings.app_timezone)))
+    pdf: Optional[bytes] = None
+
+
+@dataclass
+class FakeDatamartStats:
+    requests: int = 0
+    rows_served: int = 0
+    by_report: Dict[int, int] = field(default_factory=dict)
+
+
+def create_app(options: FakeDatamartOptions, stats: Optional[FakeDatamartStats] = None) -> FastAPI:
+    stats = stats if stats is not None else FakeDatamartStats()
+    templates = {
+        HG201_REPORT_NUMBER: _load_template_rows("hg201_two_day"),
+        None: _load_template_rows("pk600_morning_cash"),
+    }
+    app = FastAPI()
+
+    @app.get("/services/v1.1/reports/{report_number}/{report_path:path}")
+    async def report_rows(report_number: int, report_path: str, q: str = "") -> Dict[str, Any]:
+        await _delay(options.latency_ms)
+        start, end = _parse_query(q)
+        today = options.clock().date()
+        published = options.publish_at is None or options.clock().time() >= options.publish_at
+        template = templates.get(report_number, templates[None])
+        results: List[Dict[str, Any]] = []
+        for day in _weekdays(start, end):
+            if day > today or (day == today and not published):
+                continue
+            results.extend(_rows_for_day(template, day, report_path, options))
+        stats.requests += 1
+        stats.rows_served += len(results)
+        stats.by_report[report_number] = stats.by_report.get(report_number, 0) + 1
+        return {"reportSection": report_path, "stats": {"returnedRows": len(results)}, "results": results}
+
+    @app.api_route("/mnreports/{name}", methods=["GET", "HEAD"])
+    async def report_pdf(name: str, request: Request) -> Response:
+        await _delay(options.latency_ms)
+        if options.pdf is None:
+            raise HTTPException(status_code=404)
+        stats.requests += 1
+        headers = {"ETag": f'"{len(options.pdf)}"', "Content-Type": "application/pdf"}
+        body = b"" if request.method == "HEAD" else options.pdf
+        return Response(content=body, headers=headers)
+
+    return app
+
+
+class FakeDatamart:
+    """Serve :func:`create_app` on a free localhost port from a background thread."""
+
+    def __init__(self, options: Optional[FakeDatamartOptions] = None) -> None:
+        self.options = options or FakeDatamartOptions()
+        self.stats = FakeDatamartStats()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", 0))
+        self.port = self._socket.getsockname()[1]
+        config = uvicorn.Config(create_app(self.options, self.stats), log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.base_url}/services/v1.1/reports"
+
+    def __enter__(self) -> "FakeDatamart":
+        self._thread.start()
+        while not self._server.started:
+            time_module.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+        self._socket.close()
+
+
+async def _delay(latency_ms: float) -> None:
+    if latency_ms > 0:
+        await asyncio.sleep(latency_ms / 1000)
+
+
+def _load_template_rows(name: str) -> List[Dict[str, Any]]:
+    with open(f"{_FIXTURES_DIR}/{name}.json", "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    first_date = rows[0]["report_date"]
+    return [row for row in rows if row["report_date"] == first_date]
+
+
+def _parse_query(q: str) -> tuple[date, date]:
+    _, _, value = q.partition("report_date=")
+    start_text, _, end_text = value.partition(":")
+    try:
+        start = datetime.strptime(start_text.strip(), "%m/%d/%Y").date()
+        end = datetime.strptime(end_text.strip(), "%m/%d/%Y").date() if end_text else start
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid report_date filter") from exc
+    return start, end
+
+
+def _weekdays(start: date, end: date) -> List[date]:
+    days = []
+    current = start
+    while current <= end:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def _rows_for_day(
+    template: List[Dict[str, Any]], day: date, report_path: str, options: FakeDatamartOptions
+) -> List[Dict[str, Any]]:
+    report_date = day.strftime("%m/%d/%Y")
+    published = f"{report_date} {(options.publish_at or time(0, 0)).strftime('%H:%M:%S')}"
+    # Vary values by day so consecutive days hash differently.
+    bump = day.toordinal() % 7
+    rows = [
+        {**row, "report_date": report_date, "published_date": published, "section": report_path, "variant": bump}
+        for row in template
+    ]
+    for idx in range(options.rows_per_day):
+        rows.append(
+            {
+                **template[idx % len(template)],
+                "report_date": report_date,
+                "published_date": published,
+                "section": report_path,
+                "purchase_type": f"Padding {idx}",
+                "variant": bump,
+            }
+        )
+    return rows
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+_PRIMAL_COLUMNS_X = [40, 110, 160, 210, 260, 310, 360, 410, 460]
+_CATEGORIES = [
+    ("Prod. Sold Negotiated", 80.0),
+    ("Prod. Sold Swine or Pork Market Formula", 70.0),
+    ("Prod. Sold Negotiated Formula", 60.0),
+]
+
+
+def make_pdf(pages: Sequence[Sequence[Tuple[float, float, str]]]) -> bytes:
+    """Build a minimal PDF; each page is a list of (x, y, text) placements in Helvetica 9pt."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for placements in pages:
+        ops = ["BT /F1 9 Tf"] + [f"1 0 0 1 {x} {y} Tm ({text}) Tj" for x, y, text in placements] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode("latin-1")
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode("latin-1")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for idx, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{idx + 1} 0 obj\n".encode("latin-1") + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+def primal_report_pdf(report_date: date, pages: int = 3) -> bytes:
+    """A PK600 morning cutout lookalike: the primal table on the first page, filler tables after it."""
+    day = report_date.strftime("%m/%d/%Y")
+    first = [(20, 760, f"National Daily Pork Report {day}")]
+    first += _primal_row(700, ["Date", "Loads", "Carcass", "Loin", "Butt", "Pic", "Rib", "Ham", "Belly"])
+    first += _primal_row(685, [day, "145.2", "95.12", "88.10", "102.33", "70.50", "150.22", "85.40", "120.10"])
+    first += _primal_row(670, ["Change:", "", "0.52", "-1.10", "0.33", "-0.25", "1.02", "0.40", "-2.10"])
+    filler = [(40, 740 - 12 * line, f"Item {line} FOB Plant {100 + line}.25 {line * 3} loads") for line in range(55)]
+    return make_pdf([first] + [filler] * (pages - 1))
+
+
+def hg201_rows(end_date: date, years: int) -> List[Dict[str, Any]]:
+    """Three purchase-type rows per weekday for ``years`` years up to ``end_date``, as the datamart returns them."""
+    rows: List[Dict[str, Any]] = []
+    day = end_date - timedelta(days=365 * years)
+    while day <= end_date:
+        if day.weekday() < 5:
+            shift = day.toordinal() % 11
+            for purchase_type, price in _CATEGORIES:
+                rows.append(
+                    {
+                        "report_date": day.strftime("%m/%d/%Y"),
+                        "purchase_type": purchase_type,
+                        "head_count": str(1000 + shift * 10),
+                        "avg_carcass_weight": "210.5",
+                        "avg_net_price": f"{price + shift / 10:.2f}",
+                    }
+                )
+        day += timedelta(days=1)
+    return rows
+
+
+def _primal_row(y: float, values: List[str]) -> List[Tuple[float, float, str]]:
+    return [(x, y, value) for x, value in zip(_PRIMAL_COLUMNS_X, values) if value]
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time as time_module
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from app.bench.fake_datamart import FakeDatamart, FakeDatamartOptions
+from app.bench.suite import BENCH_PREFIX, NullEmailService, _seed_reports, cleanup_database, database_available
+from app.config import settings
+from app.db.session import engine
+from app.registry import EndpointConfig, PollingRule, PollingWindow, ReportConfig, ReportSchema
+from app.scheduler import SchedulerService
+from app.services.alerts import AlertService
+from app.services.http import get_client
+from app.services.market_calendar import get_calendar
+from app.workers.base import rows_from_json
+from app.workers.pk600_morning_cash import PK600MorningCashWorker
+
+
+_SYNTHETIC_REPORT_BASE = 5000
+
+
+class AcceleratedClock:
+    """Market time that advances ``speed`` times faster than wall time from ``start``."""
+
+    def __init__(self, start: datetime, speed: float) -> None:
+        self.start = start
+        self.speed = speed
+        self._origin = time_module.perf_counter()
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=(time_module.perf_counter() - self._origin) * self.speed)
+
+
+def synthetic_reports(count: int, seed: int = 0) -> List[ReportConfig]:
+    """``count`` report configs with windows between 05:00 and 17:00 and a spread of cadences, as in the MPR catalogue."""
+    rng = random.Random(seed)
+    reports = []
+    for idx in range(count):
+        report_id = f"{BENCH_PREFIX}LOAD_{idx:04d}"
+        start_minutes = rng.randrange(5 * 60, 15 * 60, 15)
+        length_minutes = rng.choice([60, 90, 150, 240])
+        end_minutes = min(start_minutes + length_minutes, 17 * 60)
+        reports.append(
+            ReportConfig(
+                report_id=report_id,
+                name=f"Synthetic {idx}",
+                endpoints=[
+                    EndpointConfig(_SYNTHETIC_REPORT_BASE + idx, f"Section {section}")
+                    for section in range(rng.choice([1, 1, 2, 3]))
+                ],
+                windows=[PollingWindow(start=_minutes(start_minutes), end=_minutes(end_minutes))],
+                polling=PollingRule(
+                    inside_cadence_sec=rng.choice([60, 120, 300, 600]),
+                    outside_cadence_sec=rng.choice([900, 1800, 3600]),
+                    max_late_hours=6,
+                    error_backoff_base_sec=120,
+                    error_backoff_max_sec=1800,
+                    jitter_sec=rng.choice([0, 15, 30]),
+                ),
+                needs_prior_day=False,
+                date_search_window_days=1,
+                schema=ReportSchema(
+                    report_id=report_id,
+                    required_fields=["head_count", "wtd_avg", "price_low", "price_high"],
+                    select_rule={"type": "date_match"},
+                    derived_fields=[],
+                ),
+            )
+        )
+    return reports
+
+
+def _minutes(value: int) -> time:
+    return time(value // 60, value % 60)
+
+
+@dataclass
+class LoadStats:
+    lags: List[float] = field(default_factory=list)
+    waits: List[float] = field(default_factory=list)
+    durations: List[float] = field(default_factory=list)
+    pool_waits: List[float] = field(default_factory=list)
+    dispatched: int = 0
+    completed: int = 0
+    failed: int = 0
+    pool_timeouts: int = 0
+    peak_running: int = 0
+    peak_waiting: int = 0
+    peak_checked_out: int = 0
+    peak_overflow: int = 0
+    running: int = 0
+    checked_out: int = 0
+
+
+class LoadTestScheduler(SchedulerService):
+    def __init__(self, stats: LoadStats, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def _run_report(self, report: ReportConfig, due: datetime, priority: int) -> bool:
+        self.stats.dispatched += 1
+        return await super()._run_report(report, due, priority)
+
+    def _record_start(self, report: ReportConfig, lag_seconds: float, wait_seconds: float) -> None:
+        super()._record_start(report, lag_seconds, wait_seconds)
+        self.stats.lags.append(lag_seconds)
+        self.stats.waits.append(wait_seconds)
+
+
+class _TimedWorker:
+    """Wraps a worker to count completions, failures and concurrent runs."""
+
+    def __init__(self, worker, stats: LoadStats) -> None:
+        self.worker = worker
+        self.stats = stats
+
+    async def run(self) -> bool:
+        stats = self.stats
+        stats.running += 1
+        stats.peak_running = max(stats.peak_running, stats.running)
+        started = time_module.perf_counter()
+        try:
+            ok = await self.worker.run()
+        except Exception as exc:
+            ok = False
+            if "QueuePool limit" in str(exc) or isinstance(exc, asyncio.TimeoutError):
+                stats.pool_timeouts += 1
+        finally:
+            stats.running -= 1
+            stats.durations.append(time_module.perf_counter() - started)
+        stats.completed += 1
+        stats.failed += 0 if ok else 1
+        return ok
+
+
+class SimulatedWorker:
+    """Stands in for a worker without Postgres.
+
+    Mirrors how ``BaseWorker`` uses the database: the fetch runs without a
+    connection, which is then held for ``db_ms`` while the run is written. The
+    connection pool is modelled as a semaphore sized like the default
+    settings (5 + 10 overflow, 30 s checkout timeout).
+    """
+
+    def __init__(self, config: ReportConfig, pool: asyncio.Semaphore, db_ms: float, stats: LoadStats) -> None:
+        self.config = config
+        self.pool = pool
+        self.db_ms = db_ms
+        self.stats = stats
+        self.forced_report_date: Optional[date] = None
+
+    async def run(self) -> bool:
+        day = (self.forced_report_date or date.today()).strftime("%m/%d/%Y")
+        async with get_client() as client:
+            for endpoint in self.config.endpoints:
+                resp = await client.get(endpoint.build_url(day))
+                resp.raise_for_status()
+                rows_from_json(resp.json())
+
+        waiting_since = time_module.perf_counter()
+        try:
+            await asyncio.wait_for(self.pool.acquire(), timeout=30.0)
+        except asyncio.TimeoutError:
+            self.stats.pool_timeouts += 1
+            return False
+        stats = self.stats
+        stats.pool_waits.append(time_module.perf_counter() - waiting_since)
+        stats.checked_out += 1
+        stats.peak_checked_out = max(stats.peak_checked_out, stats.checked_out)
+        stats.peak_overflow = max(stats.peak_overflow, stats.checked_out - 5)
+        try:
+            await asyncio.sleep(self.db_ms / 1000)
+            return True
+        finally:
+            stats.checked_out -= 1
+            self.pool.release()
+
+
+@dataclass
+class LoadTestOptions:
+    reports: int = 300
+    speed: float = 60.0
+    hours: float = 4.0
+    start: time = time(6, 0)
+    publish_at: time = time(10, 0)
+    tick_seconds: int = settings.poll_tick_seconds
+    max_concurrency: int = settings.max_concurrency
+    latency_ms: float = 50.0
+    db_ms: float = 20.0
+    mode: str = "auto"
+    seed: int = 0
+
+
+async def run_load_test(options: LoadTestOptions) -> Dict[str, object]:
+    tz = ZoneInfo(settings.app_timezone)
+    # The most recent publication day, so the scheduler does not sit out a weekend or holiday.
+    market_day = get_calendar().previous_publication_day(datetime.now(tz=tz).date() + timedelta(days=1))
+    start = datetime.combine(market_day, options.start, tzinfo=tz)
+    clock = AcceleratedClock(start, options.speed)
+    reports = synthetic_reports(options.reports, options.seed)
+    mode = options.mode
+    if mode == "auto":
+        mode = "real" if database_available() else "simulated"
+    elif mode == "real" and not settings.bench_database:
+        raise ValueError("--mode real writes BENCH_* reports to DATABASE_URL; set BENCH_DATABASE=true to allow it")
+    stats = LoadStats()
+    datamart_options = FakeDatamartOptions(latency_ms=options.latency_ms, publish_at=options.publish_at, clock=clock.now)
+
+    with FakeDatamart(datamart_options) as datamart:
+        previous_base = settings.usda_api_base
+        previous_rate = settings.usda_rate_per_second
+        settings.usda_api_base = datamart.api_base
+        # The rate budget is per virtual second, like the polling cadences.
+        settings.usda_rate_per_second = previous_rate * options.speed
+        try:
+            workers = _build_workers(reports, mode, options, stats, start.date())
+            scheduler = LoadTestScheduler(
+                stats,
+                clock=clock.now,
+                reports=lambda: reports,
+                workers=workers.get,
+                max_concurrency=options.max_concurrency,
+            )
+            sampler = asyncio.create_task(_sample_pool(stats, mode))
+            end = start + timedelta(hours=options.hours)
+            wall_started = time_module.perf_counter()
+            tick_wall = options.tick_seconds / options.speed
+            ticks = 0
+            while clock.now() < end:
+                tick_started = time_module.perf_counter()
+                await scheduler.tick()
+                ticks += 1
+                await asyncio.sleep(max(0.0, tick_wall - (time_module.perf_counter() - tick_started)))
+            backlog_at_end = stats.dispatched - stats.completed
+            while stats.completed < stats.dispatched and time_module.perf_counter() - wall_started < 600:
+                await asyncio.sleep(0.05)
+            wall_seconds = time_module.perf_counter() - wall_started
+            sampler.cancel()
+        finally:
+            settings.usda_api_base = previous_base
+            settings.usda_rate_per_second = previous_rate
+            if mode == "real":
+                cleanup_database()
+        requests = datamart.stats.requests
+
+    return {
+        "mode": mode,
+        "reports": options.reports,
+        "max_concurrency": options.max_concurrency,
+        "tick_seconds": options.tick_seconds,
+        "speed": options.speed,
+        "virtual_hours": options.hours,
+        "wall_seconds": round(wall_seconds, 2),
+        "ticks": ticks,
+        "dispatched": stats.dispatched,
+        "completed": stats.completed,
+        "failed": stats.failed,
+        "backlog_at_end": backlog_at_end,
+        "runs_per_wall_second": round(stats.completed / wall_seconds, 2) if wall_seconds else 0.0,
+        "api_requests": requests,
+        "lag_seconds": _distribution(stats.lags),
+        "slot_wait_seconds": _distribution(stats.waits),
+        "run_seconds": _distribution(stats.durations),
+        "pool_wait_seconds": _distribution(stats.pool_waits),
+        "pool_timeouts": stats.pool_timeouts,
+        "peak_running": stats.peak_running,
+        "peak_waiting": stats.peak_waiting,
+        "peak_checked_out": stats.peak_checked_out,
+        "peak_overflow": stats.peak_overflow,
+    }
+
+
+def _build_workers(
+    reports: List[ReportConfig], mode: str, options: LoadTestOptions, stats: LoadStats, today: date
+) -> Dict[str, _TimedWorker]:
+    workers: Dict[str, _TimedWorker] = {}
+    if mode == "real":
+        _seed_reports(reports)
+        email = NullEmailService()
+        alerts = AlertService(email)
+        for report in reports:
+            worker = PK600MorningCashWorker(report, email, alerts)
+            worker.forced_report_date = today
+            workers[report.report_id] = _TimedWorker(worker, stats)
+        return workers
+    pool = asyncio.Semaphore(15)
+    for report in reports:
+        simulated = SimulatedWorker(report, pool, options.db_ms, stats)
+        simulated.forced_report_date = today
+        workers[report.report_id] = _TimedWorker(simulated, stats)
+    return workers
+
+
+async def _sample_pool(stats: LoadStats, mode: str) -> None:
+    while True:
+        stats.peak_waiting = max(stats.peak_waiting, stats.dispatched - stats.completed - stats.running)
+        if mode == "real":
+            pool = engine.pool
+            stats.peak_checked_out = max(stats.peak_checked_out, pool.checkedout())
+            stats.peak_overflow = max(stats.peak_overflow, max(0, pool.overflow()))
+        await asyncio.sleep(0.01)
+
+
+def _distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered), 4),
+        "p95": round(ordered[int(round(0.95 * (len(ordered) - 1)))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def parse_args() -> LoadTestOptions:
+    parser = argparse.ArgumentParser(description="Drive the scheduler with synthetic reports on an accelerated clock.")
+    parser.add_argument("--reports", type=int, default=300)
+    parser.add_argument("--speed", type=float, default=60.0, help="Virtual seconds per wall second")
+    parser.add_argument("--hours", type=float, default=4.0, help="Virtual hours to simulate")
+    parser.add_argument("--start", default="06:00", help="Virtual market time to start at")
+    parser.add_argument("--publish-at", default="10:00", help="Market time the stand-in starts returning today's data")
+    parser.add_argument("--tick-seconds", type=int, default=settings.poll_tick_seconds)
+    parser.add_argument("--max-concurrency", type=int, default=settings.max_concurrency)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--db-ms", type=float, default=20.0, help="Database time per run in simulated mode")
+    parser.add_argument("--mode", choices=["auto", "real", "simulated"], default="auto")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    return LoadTestOptions(
+        reports=args.reports,
+        speed=args.speed,
+        hours=args.hours,
+        start=datetime.strptime(args.start, "%H:%M").time(),
+        publish_at=datetime.strptime(args.publish_at, "%H:%M").time(),
+        tick_seconds=args.tick_seconds,
+        max_concurrency=args.max_concurrency,
+        latency_ms=args.latency_ms,
+        db_ms=args.db_ms,
+        mode=args.mode,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    summary = asyncio.run(run_load_test(parse_args()))
+    for key, value in summary.items():
+        print(f"{key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def git_revision() -> Tuple[str, bool]:
+    """The checked-out commit and whether tracked files differ from it."""
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return sha, dirty
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_results(path: str, summaries: List[Dict[str, Any]], commit: str, dirty: bool) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    recorded_at = datetime.utcnow().isoformat()
+    with open(path, "a", encoding="utf-8") as f:
+        for summary in summaries:
+            if summary.get("skipped"):
+                continue
+            f.write(json.dumps({**summary, "commit": commit, "dirty": dirty, "recorded_at": recorded_at}) + "\n")
+
+
+def baseline_for(history: List[Dict[str, Any]], name: str, params: Dict[str, Any], commit: str) -> Optional[Dict[str, Any]]:
+    """The latest clean result for the same benchmark and parameters from another commit."""
+    for entry in reversed(history):
+        if entry["name"] == name and entry.get("params") == params and entry["commit"] != commit and not entry["dirty"]:
+            return entry
+    return None
+
+
+def compare(
+    history: List[Dict[str, Any]], summaries: List[Dict[str, Any]], commit: str, threshold: float
+) -> List[Dict[str, Any]]:
+    rows = []
+    for summary in summaries:
+        if summary.get("skipped"):
+            rows.append({"name": summary["name"], "skipped": summary["skipped"]})
+            continue
+        baseline = baseline_for(history, summary["name"], summary["params"], commit)
+        row: Dict[str, Any] = {"name": summary["name"], "median": summary["median"], "p95": summary["p95"]}
+        if baseline:
+            change = (summary["median"] - baseline["median"]) / baseline["median"] if baseline["median"] else 0.0
+            row.update(baseline_commit=baseline["commit"], baseline_median=baseline["median"], change=change)
+            row["regression"] = change > threshold
+        rows.append(row)
+    return rows
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, select, text
+
+from app.bench.fake_datamart import FakeDatamart
+from app.bench.fixtures import hg201_rows, primal_report_pdf
+from app.config import settings
+from app.db.models import (
+    AlertState,
+    BackfillJob,
+    Report,
+    ReportCoverage,
+    ReportPublication,
+    ReportRun,
+    ReportRunEvent,
+    ReportRunRollup,
+    ReportVersion,
+)
+from app.db.session import SessionLocal, engine
+from app.registry import EndpointConfig, ReportConfig, get_reports
+from app.services import pdf_tables
+from app.services.alerts import AlertService
+from app.services.email import EmailPayload
+from app.services.gather import fetch_range_rows, group_rows_by_date
+from app.services.http import get_client
+from app.workers.hg201_cme_index import HG201CmeIndexWorker
+from app.workers.pk600_morning_cash import PK600MorningCashWorker
+from app.workers.pk600_morning_cutout_pdf import PK600MorningCutoutPdfWorker, extract_pdf_fields
+
+
+BENCH_PREFIX = "BENCH_"
+
+
+class NullEmailService:
+    def render(self, template_name: str, context: Dict[str, object]) -> EmailPayload:
+        return EmailPayload(subject="bench", body_text="", body_html="")
+
+    def send(self, recipients: List[str], payload: EmailPayload) -> bool:
+        return False
+
+
+@dataclass
+class BenchContext:
+    datamart: FakeDatamart
+    iterations: int
+    years: int
+    today: date
+    db_available: bool
+
+
+@dataclass
+class BenchResult:
+    name: str
+    samples: List[float]
+    params: Dict[str, Any] = field(default_factory=dict)
+    skipped: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"name": self.name, "params": self.params, "skipped": self.skipped}
+        ordered = sorted(self.samples)
+        return {
+            "name": self.name,
+            "params": self.params,
+            "iterations": len(ordered),
+            "min": ordered[0],
+            "median": statistics.median(ordered),
+            "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+            "mean": statistics.fmean(ordered),
+        }
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    run: Callable[[BenchContext], BenchResult]
+    needs_db: bool = False
+
+
+def _time(name: str, func: Callable[[int], Any], iterations: int, **params: Any) -> BenchResult:
+    func(-1)  # warm-up: imports, connection pools, parse caches that every real run would have
+    samples = []
+    for idx in range(iterations):
+        started = time.perf_counter()
+        func(idx)
+        samples.append(time.perf_counter() - started)
+    return BenchResult(name=name, samples=samples, params=params)
+
+
+def _report_config(report_id: str, suffix: str) -> ReportConfig:
+    config = next(r for r in get_reports() if r.report_id == report_id)
+    bench_id = f"{BENCH_PREFIX}{report_id}_{suffix}"
+    return replace(config, report_id=bench_id, schema=replace(config.schema, report_id=bench_id))
+
+
+def _weekdays_before(day: date, count: int) -> List[date]:
+    days: List[date] = []
+    while len(days) < count:
+        day -= timedelta(days=1)
+        if day.weekday() < 5:
+            days.append(day)
+    return days
+
+
+def bench_worker_run(ctx: BenchContext) -> BenchResult:
+    """``BaseWorker.run()`` end to end: fetch from the stand-in, parse, hash, write, for a new day each time."""
+    config = _report_config("PK600_MORNING_CASH", "RUN")
+    _seed_reports([config])
+    email = NullEmailService()
+    worker = PK600MorningCashWorker(config, email, AlertService(email))
+    days = _weekdays_before(ctx.today, ctx.iterations + 1)
+
+    def run(idx: int) -> None:
+        worker.forced_report_date = days[idx]
+        if not asyncio.run(worker.run()):
+            raise RuntimeError("bench worker run failed")
+
+    return _time("worker_run_publish", run, ctx.iterations)
+
+
+def bench_worker_run_no_change(ctx: BenchContext) -> BenchResult:
+    """The common polling case: the day is already stored and the payload is unchanged."""
+    config = _report_config("PK600_MORNING_CASH", "POLL")
+    _seed_reports([config])
+    email = NullEmailService()
+    worker = PK600MorningCashWorker(config, email, AlertService(email))
+    worker.forced_report_date = _weekdays_before(ctx.today, 1)[0]
+
+    def run(idx: int) -> None:
+        if not asyncio.run(worker.run()):
+            raise RuntimeError("bench worker run failed")
+
+    return _time("worker_run_no_change", run, ctx.iterations)
+
+
+def bench_gather(ctx: BenchContext) -> BenchResult:
+    """The gather engine over ``years`` of daily rows: one streamed range request, grouped by date."""
+    config = _report_config("HG201_CME_INDEX", "GATHER")
+    start = ctx.today - timedelta(days=365 * ctx.years)
+
+    def run(idx: int) -> None:
+        group_rows_by_date(fetch_range_rows(config, start, ctx.today))
+
+    return _time("gather_range", run, ctx.iterations, years=ctx.years)
+
+
+def bench_hg201_index(ctx: BenchContext) -> BenchResult:
+    """HG201 two-day index over ``years`` of rows, as the parse stage sees a long search window."""
+    rows = hg201_rows(ctx.today, ctx.years)
+    worker = HG201CmeIndexWorker.__new__(HG201CmeIndexWorker)
+    day = worker._latest_any_date(rows)
+
+    def run(idx: int) -> None:
+        worker.compute_index_for_date(rows, day)
+
+    return _time("hg201_index", run, ctx.iterations, years=ctx.years, rows=len(rows))
+
+
+def bench_pdf_parse(ctx: BenchContext) -> BenchResult:
+    """Field extraction for a cutout PDF not seen before (cold page cache)."""
+    content = primal_report_pdf(ctx.today)
+
+    def run(idx: int) -> None:
+        pdf_tables._page_cache.clear()
+        extract_pdf_fields(content, ctx.today)
+
+    return _time("pdf_parse", run, ctx.iterations, bytes=len(content))
+
+
+def bench_pdf_fetch(ctx: BenchContext) -> BenchResult:
+    """The PDF worker's probe, download and extract against the stand-in, with a fresh worker each time.
+
+    Extraction runs on the cpu executor; with process executors the children's page caches stay warm.
+    """
+    ctx.datamart.options.pdf = primal_report_pdf(ctx.today)
+    config = _report_config("PK600_MORNING_CUTOUT_PDF", "FETCH")
+    pdf_url = f"{ctx.datamart.base_url}/mnreports/bench.pdf"
+    config = replace(config, endpoints=[EndpointConfig(0, "", absolute_url=pdf_url)])
+    email = NullEmailService()
+
+    async def fetch() -> None:
+        worker = PK600MorningCutoutPdfWorker(config, email, AlertService(email))
+        async with get_client() as client:
+            await worker._fetch_for_date_window(client)
+
+    def run(idx: int) -> None:
+        pdf_tables._page_cache.clear()
+        asyncio.run(fetch())
+
+    return _time("pdf_fetch", run, ctx.iterations)
+
+
+def bench_read_apis(ctx: BenchContext) -> List[BenchResult]:
+    """The dashboard's read endpoints over ``years`` of seeded versions and runs."""
+    from app.main import app
+
+    config = _report_config("PK600_AFTERNOON_CUTOUT", "READS")
+    _seed_reports([config])
+    _seed_history(config.report_id, ctx.today, ctx.years)
+    client = TestClient(app)
+    rid = config.report_id
+    start = (ctx.today - timedelta(days=365)).isoformat()
+    paths = {
+        "api_reports": "/api/reports",
+        "api_report_runs": f"/api/reports/{rid}/runs?limit=50",
+        "api_report_latest": f"/api/reports/{rid}/latest",
+        "api_report_historicals": f"/api/reports/{rid}/historicals?start_date={start}&end_date={ctx.today.isoformat()}",
+        "api_latency": f"/api/latency?start_date={start}",
+    }
+    results = []
+    for name, path in paths.items():
+
+        def run(idx: int, path: str = path) -> None:
+            client.get(path).raise_for_status()
+
+        results.append(_time(name, run, ctx.iterations, years=ctx.years))
+    return results
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("worker_run_publish", bench_worker_run, needs_db=True),
+    Benchmark("worker_run_no_change", bench_worker_run_no_change, needs_db=True),
+    Benchmark("gather_range", bench_gather),
+    Benchmark("hg201_index", bench_hg201_index),
+    Benchmark("pdf_parse", bench_pdf_parse),
+    Benchmark("pdf_fetch", bench_pdf_fetch),
+    Benchmark("read_apis", bench_read_apis, needs_db=True),
+]
+
+
+def run_benchmarks(ctx: BenchContext, only: Optional[List[str]] = None) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    previous_base = settings.usda_api_base
+    settings.usda_api_base = ctx.datamart.api_base
+    try:
+        for benchmark in BENCHMARKS:
+            if only and benchmark.name not in only:
+                continue
+            if benchmark.needs_db and not ctx.db_available:
+                results.append(BenchResult(name=benchmark.name, samples=[], skipped="database unavailable"))
+                continue
+            outcome = benchmark.run(ctx)
+            results.extend(outcome if isinstance(outcome, list) else [outcome])
+    finally:
+        settings.usda_api_base = previous_base
+        if ctx.db_available:
+            cleanup_database()
+    return results
+
+
+def database_available() -> bool:
+    """True when the database benchmarks may run: BENCH_DATABASE is set and DATABASE_URL answers."""
+    if not settings.bench_database:
+        return False
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+    except Exception:
+        return False
+    return True
+
+
+def _seed_reports(configs: List[ReportConfig]) -> None:
+    with SessionLocal() as db:
+        for config in configs:
+            if not db.get(Report, config.report_id):
+                db.add(Report(id=config.report_id, name=config.name, config=config.to_db_config()))
+        db.commit()
+
+
+def _seed_history(report_id: str, today: date, years: int) -> None:
+    """One version, one run and one publication per weekday, plus the repeated polls compacted onto each run."""
+    days = _weekdays_before(today + timedelta(days=1), 261 * years)
+    versions, runs, publications = [], [], []
+    for idx, day in enumerate(days):
+        published = datetime.combine(day, datetime.min.time()) + timedelta(hours=18)
+        payload_hash = f"{report_id}-{day.isoformat()}"
+        versions.append(
+            {
+                "id": f"{report_id}-v{idx}",
+                "report_id": report_id,
+                "report_date": day,
+                "payload_hash": payload_hash,
+                "parsed_fields": {"report_date": day.isoformat(), "carcass": 95.0 + idx % 9, "loin": 88.1},
+                "raw_payload": {"payloads": [[{"report_date": day.strftime("%m/%d/%Y")}]], "urls": []},
+                "created_at": published + timedelta(seconds=40),
+            }
+        )
+        runs.append(
+            {
+                "id": f"{report_id}-r{idx}",
+                "report_id": report_id,
+                "report_date": day,
+                "state": "published_new",
+                "payload_hash": payload_hash,
+                "run_started_at": published + timedelta(seconds=30),
+                "run_finished_at": published + timedelta(seconds=40),
+                "repeat_count": 1,
+            }
+        )
+        publications.append(
+            {
+                "report_id": report_id,
+                "report_date": day,
+                "published_at": published,
+                "published_source": "api",
+                "detected_at": published + timedelta(seconds=40),
+                "emailed_at": published + timedelta(seconds=45),
+            }
+        )
+    with SessionLocal() as db:
+        db.execute(insert(ReportVersion), versions)
+        db.execute(insert(ReportRun), runs)
+        db.execute(insert(ReportPublication), publications)
+        db.commit()
+
+
+def cleanup_database() -> None:
+    with SessionLocal() as db:
+        # autoescape: "_" in the prefix is literal, not a LIKE wildcard matching real report ids.
+        bench_ids = select(Report.id).where(Report.id.startswith(BENCH_PREFIX, autoescape=True))
+        run_ids = select(ReportRun.id).where(ReportRun.report_id.in_(bench_ids))
+        db.execute(delete(ReportRunEvent).where(ReportRunEvent.report_run_id.in_(run_ids)))
+        for model in (
+            ReportRun,
+            ReportVersion,
+            ReportPublication,
+            ReportRunRollup,
+            AlertState,
+            ReportCoverage,
+            BackfillJob,
+        ):
+            db.execute(delete(model).where(model.report_id.in_(bench_ids)))
+        db.execute(delete(Report).where(Report.id.startswith(BENCH_PREFIX, autoescape=True)))
+        db.commit()
@@ -8,7 +8,9 @@ from sqlalchemy import (
     Column,
     Date,
     DateTime,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -46,10 +48,16 @@ class ReportRun(Base):
     error_type = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
     payload_hash = Column(String, nullable=True)
+    repeat_count = Column(Integer, default=1, nullable=False)
+    last_seen_at = Column(DateTime, nullable=True)
 
     report = relationship("Report", back_populates="runs")
     events = relationship("ReportRunEvent", back_populates="run")
 
+    __table_args__ = (
+        Index("ix_report_runs_report_started", "report_id", "run_started_at"),
+    )
+
 
 class ReportVersion(Base):
     __tablename__ = "report_versions"
@@ -81,6 +89,70 @@ class ReportRunEvent(Base):
 
     run = relationship("ReportRun", back_populates="events")
 
+    __table_args__ = (
+        Index("ix_report_run_events_run_id", "report_run_id"),
+    )
+
+
+class ReportRunRollup(Base):
+    __tablename__ = "report_run_rollups"
+
+    report_id = Column(String, ForeignKey("reports.id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    state = Column(String, primary_key=True)
+    run_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ReportPublication(Base):
+    __tablename__ = "report_publications"
+
+    report_id = Column(String, ForeignKey("reports.id"), primary_key=True)
+    report_date = Column(Date, primary_key=True)
+    published_at = Column(DateTime, nullable=False)
+    published_source = Column(String, nullable=False)
+    detected_at = Column(DateTime, nullable=False)
+    emailed_at = Column(DateTime, nullable=True)
+
+
+class ReportCoverage(Base):
+    __tablename__ = "report_coverage"
+
+    report_id = Column(String, ForeignKey("reports.id"), primary_key=True)
+    report_date = Column(Date, primary_key=True)
+    # "version" once a version is stored; "empty" when a gather found no rows for a day USDA has since moved past.
+    status = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class BackfillJob(Base):
+    __tablename__ = "backfill_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    report_id = Column(String, ForeignKey("reports.id"), nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    chunk_days = Column(Integer, nullable=False)
+    force = Column(Boolean, default=False, nullable=False)
+    # pending, running, completed or failed.
+    status = Column(String, nullable=False)
+    # Checkpoint: the first date not yet gathered. Chunks before it are committed.
+    next_date = Column(Date, nullable=False)
+    chunks_total = Column(Integer, nullable=False)
+    chunks_done = Column(Integer, default=0, nullable=False)
+    inserted = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Time spent working chunks, excluding queueing and downtime between attempts.
+    active_seconds = Column(Float, default=0.0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_backfill_jobs_status", "status"),)
+
 
 class Recipient(Base):
     __tablename__ = "recipients"
@@ -1,9 +1,64 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.config import settings
+from app.services.metrics import Counter, Gauge, Histogram
+
+
+POOL_WAIT_SECONDS = Histogram(
+    "usda_db_pool_wait_seconds", "Time spent waiting to check out a pooled connection (including connecting)."
+)
+POOL_HOLD_SECONDS = Histogram(
+    "usda_db_pool_hold_seconds",
+    "Time a pooled connection stayed checked out.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+POOL_TIMEOUTS = Counter("usda_db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT.")
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, so saturation shows up as wait time rather than slow endpoints."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+engine = create_engine(
+    settings.database_url,
+    poolclass=InstrumentedQueuePool,
+    pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+    if checked_out_at is not None:
+        POOL_HOLD_SECONDS.observe(time.perf_counter() - checked_out_at)
+
+
+Gauge("usda_db_pool_size", "Configured pool size.", callback=lambda: engine.pool.size())
+Gauge("usda_db_pool_checked_out", "Connections currently checked out.", callback=lambda: engine.pool.checkedout())
+Gauge("usda_db_pool_overflow", "Connections open beyond the pool size.", callback=lambda: max(0, engine.pool.overflow()))
@@ -6,16 +6,31 @@ from datetime import date, datetime, timedelta
 
 from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 
 from app.config import settings
-from app.db.models import AlertState, Recipient, RecipientReport, Report, ReportRun, ReportRunEvent, ReportVersion
+from app.db.models import (
+    AlertState,
+    BackfillJob,
+    Recipient,
+    RecipientReport,
+    Report,
+    ReportPublication,
+    ReportRun,
+    ReportRunEvent,
+    ReportVersion,
+)
 from app.db.session import SessionLocal
 from app.registry import RECIPIENTS, get_reports, report_config_from_dict, set_report_overrides
 from app.scheduler import SchedulerService
+from app.services.backfill import create_job, job_to_dict
+from app.services.executors import shutdown_executors
 from app.services.logging import configure_logging
-from app.services.gather import fetch_range_payloads, fetch_range_rows, group_rows_by_date
-from app.workers.hg201_cme_index import HG201CmeIndexWorker
+from app.services.metrics import render_metrics
+from app.services.http import close_clients
+from app.services.gather import gather_report
+from app.services.publications import latency_summary, publication_to_dict
 from app.workers.registry import get_worker, init_workers, reload_workers
 
 
@@ -40,8 +55,10 @@ def startup() -> None:
 
 
 @app.on_event("shutdown")
-def shutdown() -> None:
+async def shutdown() -> None:
     scheduler.shutdown()
+    shutdown_executors()
+    await close_clients()
 
 
 @app.get("/health")
@@ -49,6 +66,11 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    return render_metrics()
+
+
 @app.get("/api/health")
 def api_health() -> dict:
     db_ok = True
@@ -143,6 +165,28 @@ def api_report_historicals(
     ]
 
 
+@app.get("/api/reports/{report_id}/latency")
+def api_report_latency(
+    report_id: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    publications = _publications_in_range(start_date, end_date, report_id)
+    return {
+        "report_id": report_id,
+        **latency_summary(publications),
+        "publications": [publication_to_dict(p) for p in publications],
+    }
+
+
+@app.get("/api/latency")
+def api_latency(start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[dict]:
+    by_report: Dict[str, List[ReportPublication]] = {}
+    for publication in _publications_in_range(start_date, end_date):
+        by_report.setdefault(publication.report_id, []).append(publication)
+    return [{"report_id": report_id, **latency_summary(items)} for report_id, items in sorted(by_report.items())]
+
+
 @app.get("/api/reports/{report_id}/config")
 def api_report_config(report_id: str) -> Dict[str, Any]:
     with SessionLocal() as db:
@@ -187,57 +231,71 @@ def api_report_gather(report_id: str, payload: Dict[str, Any] = Body(...)) -> Di
     worker = get_worker(report_id)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
+    return gather_report(report, worker, start, end, force=bool(payload.get("force")))
 
-    if report_id == "HG201_CME_INDEX":
-        rows = fetch_range_rows(report, start, end)
-        if not rows:
-            return {"status": "ok", "inserted": 0, "skipped": 0}
-        grouped = group_rows_by_date(rows)
-        payloads_by_date = {day: [rows] for day in grouped.keys()}
-    else:
-        payloads_by_date = fetch_range_payloads(report, start, end)
-    inserted = 0
-    skipped = 0
+
+@app.post("/api/backfills")
+def api_create_backfill(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    report_id = payload.get("report_id")
+    start = _parse_date(payload.get("start_date"))
+    end = _parse_date(payload.get("end_date"))
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must be <= end_date")
+    report = next((r for r in get_reports() if r.report_id == report_id), None)
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if report.endpoints and report.endpoints[0].absolute_url:
+        raise HTTPException(status_code=400, detail="Gather is not supported for PDF reports")
+    chunk_days = payload.get("chunk_days")
+    if chunk_days is not None and (
+        isinstance(chunk_days, bool) or not isinstance(chunk_days, int) or chunk_days < 1
+    ):
+        raise HTTPException(status_code=400, detail="chunk_days must be a positive integer")
     with SessionLocal() as db:
-        for report_date, payloads in payloads_by_date.items():
-            if report_id == "HG201_CME_INDEX":
-                parsed_fields = _compute_hg201_day(rows, report_date)
-                payload_hash = worker.compute_hash_from_payloads([rows])
-            else:
-                parsed_fields = worker._parse(payloads, report_date)
-                payload_hash = worker.compute_hash_from_payloads(payloads)
-            existing = (
-                db.query(ReportVersion)
-                .filter(
-                    ReportVersion.report_id == report_id,
-                    ReportVersion.report_date == report_date,
-                    ReportVersion.payload_hash == payload_hash,
-                )
-                .first()
-            )
-            if existing:
-                existing.parsed_fields = worker._merge_parsed_fields(
-                    existing.parsed_fields or {}, parsed_fields
-                )
-                db.add(existing)
-                skipped += 1
-                continue
-            version = ReportVersion(
-                report_id=report_id,
-                report_date=report_date,
-                payload_hash=payload_hash,
-                parsed_fields=parsed_fields,
-                raw_payload={"payloads": payloads},
-            )
-            db.add(version)
-            inserted += 1
+        job = create_job(db, report.report_id, start, end, chunk_days, force=bool(payload.get("force")))
         db.commit()
-    return {"status": "ok", "inserted": inserted, "skipped": skipped}
+        result = job_to_dict(job)
+    scheduler.start_backfill(result["id"])
+    return result
+
+
+@app.get("/api/backfills")
+def api_backfills(report_id: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+    with SessionLocal() as db:
+        query = db.query(BackfillJob)
+        if report_id:
+            query = query.filter(BackfillJob.report_id == report_id)
+        if status:
+            query = query.filter(BackfillJob.status == status)
+        jobs = query.order_by(BackfillJob.created_at.desc()).limit(limit).all()
+        return [job_to_dict(job) for job in jobs]
+
+
+@app.get("/api/backfills/{job_id}")
+def api_backfill(job_id: str) -> Dict[str, Any]:
+    with SessionLocal() as db:
+        job = db.get(BackfillJob, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Backfill job not found")
+        return job_to_dict(job)
+
+
+@app.post("/api/backfills/{job_id}/resume")
+def api_resume_backfill(job_id: str) -> Dict[str, Any]:
+    with SessionLocal() as db:
+        job = db.get(BackfillJob, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Backfill job not found")
+        if job.status != "failed":
+            raise HTTPException(status_code=409, detail=f"Backfill job is {job.status}")
+        result = job_to_dict(job)
+    scheduler.start_backfill(job_id)
+    return result
 
 
 @app.post("/api/reports/{report_id}/run")
-async def api_run_report(report_id: str) -> dict:
-    return await run_report(report_id)
+async def api_run_report(report_id: str, wait: bool = False) -> dict:
+    return await run_report(report_id, wait)
 
 
 @app.get("/api/alerts")
@@ -316,12 +374,18 @@ def get_report(report_id: str) -> dict:
 
 
 @app.post("/run/{report_id}")
-async def run_report(report_id: str) -> dict:
-    worker = get_worker(report_id)
-    if not worker:
+async def run_report(report_id: str, wait: bool = False) -> dict:
+    if not get_worker(report_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+    already_running = report_id in scheduler.inflight
+    task = scheduler.trigger(report_id)
+    if not task:
         raise HTTPException(status_code=404, detail="Report not found")
-    asyncio.create_task(worker.run())
-    return {"status": "started", "report_id": report_id}
+    if not wait:
+        return {"status": "already_running" if already_running else "started", "report_id": report_id}
+    # Shielded so a client disconnect does not cancel a run the scheduler may share.
+    success = await asyncio.shield(task)
+    return {"status": "succeeded" if success else "failed", "report_id": report_id, "joined": already_running}
 
 
 def _seed_registry() -> None:
@@ -410,9 +474,18 @@ def _parse_date(value: Optional[str]) -> date:
         raise HTTPException(status_code=400, detail="Invalid date format (expected YYYY-MM-DD)") from exc
 
 
-def _compute_hg201_day(rows: List[Dict[str, Any]], report_date: date) -> Dict[str, Any]:
-    worker = HG201CmeIndexWorker.__new__(HG201CmeIndexWorker)
-    return worker.compute_index_for_date(rows, report_date)
+def _publications_in_range(
+    start_date: Optional[str], end_date: Optional[str], report_id: Optional[str] = None
+) -> List[ReportPublication]:
+    with SessionLocal() as db:
+        query = db.query(ReportPublication)
+        if report_id:
+            query = query.filter(ReportPublication.report_id == report_id)
+        if start_date:
+            query = query.filter(ReportPublication.report_date >= _parse_date(start_date))
+        if end_date:
+            query = query.filter(ReportPublication.report_date <= _parse_date(end_date))
+        return query.order_by(ReportPublication.report_date.desc()).all()
 
 
 def _run_to_dict(run: ReportRun | None) -> dict | None:
@@ -429,6 +502,8 @@ def _run_to_dict(run: ReportRun | None) -> dict | None:
         "error_type": run.error_type,
         "error_message": run.error_message,
         "payload_hash": run.payload_hash,
+        "repeat_count": run.repeat_count,
+        "last_seen_at": run.last_seen_at.isoformat() if run.last_seen_at else None,
     }
 
 
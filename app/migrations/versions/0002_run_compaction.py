@@ -0,0 +1,39 @@
+"""run compaction and rollups
+
+Revision ID: 0002_run_compaction
+Revises: 0001_initial
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002_run_compaction"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("report_runs", sa.Column("repeat_count", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column("report_runs", sa.Column("last_seen_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_report_runs_report_started", "report_runs", ["report_id", "run_started_at"])
+    op.create_index("ix_report_run_events_run_id", "report_run_events", ["report_run_id"])
+    op.create_table(
+        "report_run_rollups",
+        sa.Column("report_id", sa.String(), sa.ForeignKey("reports.id"), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("state", sa.String(), primary_key=True),
+        sa.Column("run_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("report_run_rollups")
+    op.drop_index("ix_report_run_events_run_id", table_name="report_run_events")
+    op.drop_index("ix_report_runs_report_started", table_name="report_runs")
+    op.drop_column("report_runs", "last_seen_at")
+    op.drop_column("report_runs", "repeat_count")
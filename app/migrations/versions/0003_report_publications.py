@@ -0,0 +1,32 @@
+"""report publication latency
+
+Revision ID: 0003_report_publications
+Revises: 0002_run_compaction
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003_report_publications"
+down_revision = "0002_run_compaction"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_publications",
+        sa.Column("report_id", sa.String(), sa.ForeignKey("reports.id"), primary_key=True),
+        sa.Column("report_date", sa.Date(), primary_key=True),
+        sa.Column("published_at", sa.DateTime(), nullable=False),
+        sa.Column("published_source", sa.String(), nullable=False),
+        sa.Column("detected_at", sa.DateTime(), nullable=False),
+        sa.Column("emailed_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("report_publications")
@@ -0,0 +1,35 @@
+"""report coverage index
+
+Revision ID: 0004_report_coverage
+Revises: 0003_report_publications
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004_report_coverage"
+down_revision = "0003_report_publications"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_coverage",
+        sa.Column("report_id", sa.String(), sa.ForeignKey("reports.id"), primary_key=True),
+        sa.Column("report_date", sa.Date(), primary_key=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.execute(
+        "insert into report_coverage (report_id, report_date, status, updated_at) "
+        "select report_id, report_date, 'version', min(created_at) from report_versions "
+        "group by report_id, report_date"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("report_coverage")
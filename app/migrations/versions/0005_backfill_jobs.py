@@ -0,0 +1,47 @@
+"""backfill jobs
+
+Revision ID: 0005_backfill_jobs
+Revises: 0004_report_coverage
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0005_backfill_jobs"
+down_revision = "0004_report_coverage"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backfill_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("report_id", sa.String(), sa.ForeignKey("reports.id"), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("chunk_days", sa.Integer(), nullable=False),
+        sa.Column("force", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("next_date", sa.Date(), nullable=False),
+        sa.Column("chunks_total", sa.Integer(), nullable=False),
+        sa.Column("chunks_done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("inserted", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("skipped", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("active_seconds", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_backfill_jobs_status", "backfill_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_backfill_jobs_status", table_name="backfill_jobs")
+    op.drop_table("backfill_jobs")
@@ -0,0 +1,109 @@
+"""rehash stored versions after payload hash changes
+
+PK600_MORNING_CUTOUT_PDF no longer hashes the pdf_base64 copy of the PDF,
+and HG201_CME_INDEX fetches only the prior publication day through the
+report date instead of the whole search window. Stored hashes are
+recomputed from raw_payload as the worker now computes them, so the first
+poll after deploy finds the stored version instead of recording and
+emailing the same report again.
+
+Revision ID: 0006_rehash_versions
+Revises: 0005_backfill_jobs
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.services.hashing import payload_hash
+from app.services.market_calendar import get_calendar
+
+# revision identifiers, used by Alembic.
+revision = "0006_rehash_versions"
+down_revision = "0005_backfill_jobs"
+branch_labels = None
+depends_on = None
+
+
+Payloads = List[List[Dict[str, Any]]]
+
+versions = sa.table(
+    "report_versions",
+    sa.column("id", sa.String()),
+    sa.column("report_id", sa.String()),
+    sa.column("report_date", sa.Date()),
+    sa.column("payload_hash", sa.String()),
+    sa.column("raw_payload", JSONB()),
+)
+
+
+def _pdf_hash(payloads: Payloads, report_date: date) -> str:
+    return payload_hash(payloads, frozenset({"pdf_base64"}))
+
+
+def _hg201_hash(payloads: Payloads, report_date: date) -> str:
+    prior = get_calendar().previous_publication_day(report_date)
+    narrowed = [[row for row in rows if prior <= (_row_date(row) or date.min) <= report_date] for rows in payloads]
+    found = {_row_date(row) for rows in narrowed for row in rows}
+    if prior not in found or report_date not in found:
+        # Without both days the worker falls back to the whole window, as the stored payload already does.
+        return payload_hash(payloads)
+    return payload_hash(narrowed)
+
+
+def _row_date(row: Dict[str, Any]) -> Optional[date]:
+    try:
+        return datetime.strptime(str(row.get("report_date", "")).strip()[:10], "%m/%d/%Y").date()
+    except ValueError:
+        return None
+
+
+# The worker's hash of a stored version's payloads under the current scheme, per report.
+REHASH: Dict[str, Callable[[Payloads, date], str]] = {
+    "PK600_MORNING_CUTOUT_PDF": _pdf_hash,
+    "HG201_CME_INDEX": _hg201_hash,
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    report_ids = list(REHASH)
+    taken = {
+        tuple(row)
+        for row in bind.execute(
+            sa.select(versions.c.report_id, versions.c.report_date, versions.c.payload_hash).where(
+                versions.c.report_id.in_(report_ids)
+            )
+        )
+    }
+    updates = []
+    columns = [versions.c.id, versions.c.report_id, versions.c.report_date, versions.c.payload_hash]
+    result = bind.execution_options(stream_results=True, yield_per=100).execute(
+        sa.select(*columns, versions.c.raw_payload).where(versions.c.report_id.in_(report_ids))
+    )
+    for row in result:
+        payloads = (row.raw_payload or {}).get("payloads") or []
+        new_hash = REHASH[row.report_id](payloads, row.report_date)
+        key = (row.report_id, row.report_date, new_hash)
+        # Two stored versions can share the new hash; the first keeps it and the other keeps its old one.
+        if new_hash == row.payload_hash or key in taken:
+            continue
+        taken.add(key)
+        updates.append({"version_id": row.id, "new_hash": new_hash})
+    if updates:
+        bind.execute(
+            versions.update()
+            .where(versions.c.id == sa.bindparam("version_id"))
+            .values(payload_hash=sa.bindparam("new_hash")),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    # The old hashes cannot all be recomputed (the old inputs are gone); the new ones are left in place.
+    pass
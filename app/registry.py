@@ -4,8 +4,7 @@ from dataclasses import dataclass, asdict
 from datetime import time
 from typing import Any, Dict, List, Optional
 
-
-API_BASE = "https://mpr.datamart.ams.usda.gov/services/v1.1/reports"
+from app.config import settings
 
 
 @dataclass(frozen=True)
@@ -17,7 +16,7 @@ class EndpointConfig:
     def build_url(self, report_date_str: str) -> str:
         if self.absolute_url:
             return self.absolute_url
-        return f"{API_BASE}/{self.report_number}/{self.report_path}?q=report_date={report_date_str}"
+        return f"{settings.usda_api_base}/{self.report_number}/{self.report_path}?q=report_date={report_date_str}"
 
 
 @dataclass(frozen=True)
@@ -3,31 +3,127 @@ from __future__ import annotations
 import asyncio
 import logging
 import random
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import time
+from datetime import datetime, time as time_of_day, timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional, Set
+from urllib.parse import urlparse, urlsplit
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.config import settings
+from app.db.models import ReportPublication
+from app.db.session import SessionLocal
 from app.registry import ReportConfig, get_reports
+from app.services.backfill import resume_jobs, run_job
+from app.services.concurrency import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_MANUAL,
+    PRIORITY_NAMES,
+    PRIORITY_WINDOW,
+    PriorityLimiter,
+)
+from app.services.executors import run_in_executor
+from app.services.gather import fill_gaps
+from app.services.http import get_client
+from app.services.market_calendar import MarketCalendar, get_calendar
+from app.services.metrics import Counter, Gauge, Histogram
+from app.services.publications import predicted_publication_times
+from app.services.retention import rollup_run_history
+from app.services.throttle import circuit_open
+from app.workers.base import BaseWorker
 from app.workers.registry import get_worker
 
 
 logger = logging.getLogger(__name__)
 
 
+SCHEDULER_LAG_SECONDS = Histogram(
+    "usda_scheduler_lag_seconds",
+    "Delay between a report falling due and its run starting.",
+    buckets=(1, 5, 15, 30, 60, 90, 120, 300, 600, 1800),
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "usda_scheduler_wait_seconds", "Time a due run waited for a concurrency slot.", ["priority"]
+)
+SCHEDULER_QUEUED = Gauge("usda_scheduler_queued_runs", "Runs waiting for a concurrency slot.")
+SCHEDULER_RUNNING = Gauge("usda_scheduler_running_runs", "Runs holding a concurrency slot.")
+SCHEDULER_SKIPPED = Counter(
+    "usda_scheduler_skipped_total",
+    "Due polls skipped without running; non_publication_day counts skipped ticks.",
+    ["reason"],
+)
+SCHEDULER_COALESCED = Counter(
+    "usda_scheduler_coalesced_total",
+    "Triggers that found the report already queued or running and joined that run.",
+    ["source"],
+)
+
+
+# Polls this close to a window opening are treated as in-window: publication is imminent.
+WINDOW_LEAD = timedelta(minutes=15)
+# Publications this far back feed the predicted publication times used for connection warm-up.
+PREDICTION_LOOKBACK = timedelta(days=30)
+
+
 class SchedulerService:
-    def __init__(self) -> None:
+    """Polls due reports every tick, at most ``max_concurrency`` at a time.
+
+    Slots go to in-window (or about to open) reports first, then manual
+    triggers, then out-of-window polls, with at most
+    ``max_concurrency_per_host`` runs against any one host.
+
+    Each report has at most one run queued or running (``inflight``). Ticks
+    skip reports that are still in flight, and manual triggers join the
+    in-flight run instead of starting another.
+
+    Nothing is polled on days the market calendar says USDA does not
+    publish; manual triggers still run. Shortly before each window opens,
+    and before each report's predicted publication time, the shared HTTP
+    client opens connections to the report's hosts so the first in-window
+    poll does not pay for DNS and TLS.
+
+    ``clock``, ``reports`` and ``workers`` default to wall time, the registry
+    and the worker registry; the load test (app/bench/loadtest.py) swaps them.
+    """
+
+    def __init__(
+        self,
+        clock: Optional[Callable[[], datetime]] = None,
+        reports: Callable[[], List[ReportConfig]] = get_reports,
+        workers: Callable[[str], Optional[BaseWorker]] = get_worker,
+        max_concurrency: Optional[int] = None,
+        calendar: Optional[MarketCalendar] = None,
+    ) -> None:
         self.scheduler = AsyncIOScheduler()
         self.state: Dict[str, Dict[str, object]] = {}
-        self.semaphore = asyncio.Semaphore(settings.max_concurrency)
+        self.limiter = PriorityLimiter(
+            max_concurrency or settings.max_concurrency, settings.max_concurrency_per_host
+        )
         self.tz = ZoneInfo(settings.app_timezone)
+        self.clock = clock or (lambda: datetime.now(tz=self.tz))
+        self.reports = reports
+        self.workers = workers
+        self.calendar = calendar or get_calendar()
+        self.inflight: Dict[str, "asyncio.Task[bool]"] = {}
 
     def start(self) -> None:
         self.scheduler.add_job(self.tick, "interval", seconds=settings.poll_tick_seconds)
+        self.scheduler.add_job(rollup_run_history, "cron", hour=2, minute=30, timezone=self.tz)
+        if settings.gap_fill_days > 0:
+            self.scheduler.add_job(fill_gaps, "cron", hour=3, minute=0, timezone=self.tz)
+        # Pending jobs start now; failed jobs and jobs whose runner died (e.g. a restart) are retried every interval.
+        self.scheduler.add_job(resume_jobs)
+        self.scheduler.add_job(resume_jobs, "interval", minutes=settings.backfill_resume_minutes)
+        if settings.http_warmup_lead_seconds > 0:
+            self.scheduler.add_job(self.plan_warmups, "cron", hour=0, minute=5, timezone=self.tz)
+            self.scheduler.add_job(self.plan_warmups)
         self.scheduler.start()
 
+    def start_backfill(self, job_id: str) -> None:
+        """Run a backfill job on the scheduler's thread pool, off the event loop."""
+        self.scheduler.add_job(run_job, args=[job_id])
+
     def shutdown(self) -> None:
         self.scheduler.shutdown(wait=False)
 
@@ -50,24 +146,146 @@ class SchedulerService:
                 return True
         return False
 
+    async def plan_warmups(self) -> None:
+        """Schedule today's remaining connection warm-ups as one-off jobs."""
+        try:
+            predicted = await run_in_executor("io", self._predicted_publications)
+        except Exception:
+            logger.warning("publication predictions unavailable; warming before windows only", exc_info=True)
+            predicted = {}
+        for run_at, origins in sorted(self.warmup_plan(self.clock(), predicted).items()):
+            # Stable ids: a plan made at startup and again at 00:05 replaces, rather than repeats, a warm-up.
+            self.scheduler.add_job(
+                self.warm,
+                "date",
+                run_date=run_at,
+                args=[sorted(origins)],
+                id=f"warmup:{run_at.isoformat()}",
+                replace_existing=True,
+            )
+
+    def warmup_plan(self, now: datetime, predicted: Dict[str, time_of_day]) -> Dict[datetime, Set[str]]:
+        """Origins to warm, keyed by time: a lead before each window start and predicted publication left today."""
+        local = now.astimezone(self.tz)
+        lead = timedelta(seconds=settings.http_warmup_lead_seconds)
+        plan: Dict[datetime, Set[str]] = {}
+        if not self.calendar.is_publication_day(local.date()):
+            return plan
+        for report in self.reports():
+            moments = [window.start for window in report.windows]
+            if report.report_id in predicted:
+                moments.append(predicted[report.report_id])
+            for moment in moments:
+                run_at = datetime.combine(local.date(), moment, tzinfo=self.tz) - lead
+                if run_at > local:
+                    plan.setdefault(run_at, set()).update(self._origins(report))
+        return plan
+
+    async def warm(self, origins: List[str]) -> None:
+        client = get_client()
+        for origin in origins:
+            if circuit_open(urlsplit(origin).hostname or ""):
+                continue
+            ready = await client.warm(origin, settings.http_warmup_connections)
+            logger.info("warmed connections", extra={"origin": origin, "connections": ready})
+
+    def _predicted_publications(self) -> Dict[str, time_of_day]:
+        since = datetime.utcnow() - PREDICTION_LOOKBACK
+        with SessionLocal() as db:
+            publications = db.query(ReportPublication).filter(ReportPublication.published_at >= since).all()
+        return predicted_publication_times(publications, self.tz)
+
     async def tick(self) -> None:
-        now = datetime.now(tz=self.tz)
-        for report in get_reports():
+        now = self.clock()
+        if not self.calendar.is_publication_day(now.astimezone(self.tz).date()):
+            # Due polls stay due and run on the next publication day.
+            SCHEDULER_SKIPPED.inc(reason="non_publication_day")
+            return
+        for report in self.reports():
             report_state = self.state.setdefault(report.report_id, {"next_due": now, "error_count": 0})
             next_due: datetime = report_state["next_due"]  # type: ignore[assignment]
             if now < next_due:
                 continue
             report_state["next_due"] = self._next_due(report, now, report_state["error_count"])  # type: ignore[index]
-            asyncio.create_task(self._run_report(report))
+            if any(circuit_open(host) for host in self._hosts(report)):
+                # The request would be refused anyway; the breaker lets a single probe through once it half-opens.
+                SCHEDULER_SKIPPED.inc(reason="circuit_open")
+                continue
+            self.submit(report, next_due, self._priority(report, now, manual=False), source="tick")
+
+    def trigger(self, report_id: str) -> Optional["asyncio.Task[bool]"]:
+        """Run a report now, or return its in-flight run; None for unknown reports."""
+        report = next((r for r in self.reports() if r.report_id == report_id), None)
+        if not report:
+            return None
+        now = self.clock()
+        return self.submit(report, now, self._priority(report, now, manual=True), source="manual")
 
-    async def _run_report(self, report: ReportConfig) -> None:
-        async with self.semaphore:
-            worker = get_worker(report.report_id)
+    def submit(self, report: ReportConfig, due: datetime, priority: int, source: str) -> "asyncio.Task[bool]":
+        running = self.inflight.get(report.report_id)
+        if running and not running.done():
+            SCHEDULER_COALESCED.inc(source=source)
+            self.limiter.promote(report.report_id, priority)
+            return running
+        task = asyncio.create_task(self._run_report(report, due, priority))
+        self.inflight[report.report_id] = task
+        task.add_done_callback(lambda _: self._forget(report.report_id, task))
+        return task
+
+    def _forget(self, report_id: str, task: "asyncio.Task[bool]") -> None:
+        if self.inflight.get(report_id) is task:
+            del self.inflight[report_id]
+
+    def _priority(self, report: ReportConfig, now: datetime, manual: bool) -> int:
+        if self._is_within_window(report, now) or self._is_within_window(report, now + WINDOW_LEAD):
+            return PRIORITY_WINDOW
+        return PRIORITY_MANUAL if manual else PRIORITY_BACKGROUND
+
+    @staticmethod
+    def _hosts(report: ReportConfig) -> FrozenSet[str]:
+        return frozenset(urlparse(endpoint.build_url("")).hostname or "" for endpoint in report.endpoints)
+
+    @staticmethod
+    def _origins(report: ReportConfig) -> FrozenSet[str]:
+        origins = set()
+        for endpoint in report.endpoints:
+            parts = urlsplit(endpoint.build_url(""))
+            origins.add(f"{parts.scheme}://{parts.netloc}/")
+        return frozenset(origins)
+
+    async def _run_report(self, report: ReportConfig, due: datetime, priority: int) -> bool:
+        report_state = self.state.setdefault(report.report_id, {"next_due": due, "error_count": 0})
+        hosts = self._hosts(report)
+        waiting_since = time.perf_counter()
+        SCHEDULER_QUEUED.inc()
+        try:
+            await self.limiter.acquire(priority, hosts, key=report.report_id)
+        finally:
+            SCHEDULER_QUEUED.dec()
+        SCHEDULER_RUNNING.inc()
+        try:
+            wait_seconds = time.perf_counter() - waiting_since
+            SCHEDULER_WAIT_SECONDS.observe(wait_seconds, priority=PRIORITY_NAMES[priority])
+            self._record_start(report, (self.clock() - due).total_seconds(), wait_seconds)
+            worker = self.workers(report.report_id)
             if not worker:
-                return
+                return False
             success = await worker.run()
-            if success:
-                self.state[report.report_id]["error_count"] = 0  # type: ignore[index]
-            else:
-                logger.error("worker error", extra={"report_id": report.report_id})
-                self.state[report.report_id]["error_count"] = self.state[report.report_id]["error_count"] + 1  # type: ignore[index]
+        finally:
+            SCHEDULER_RUNNING.dec()
+            self.limiter.release(hosts)
+        if success:
+            report_state["error_count"] = 0
+        else:
+            logger.error("worker error", extra={"report_id": report.report_id})
+            report_state["error_count"] = report_state["error_count"] + 1  # type: ignore[operator]
+        return success
+
+    def _record_start(self, report: ReportConfig, lag_seconds: float, wait_seconds: float) -> None:
+        # Lag is on the scheduler clock and includes tick granularity; wait is wall time spent queued for a slot.
+        # The wait histogram is observed by the caller, per priority.
+        SCHEDULER_LAG_SECONDS.observe(max(0.0, lag_seconds))
+        logger.debug(
+            "run started",
+            extra={"report_id": report.report_id, "lag_seconds": lag_seconds, "wait_seconds": wait_seconds},
+        )
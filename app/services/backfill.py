@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import BackfillJob
+from app.db.session import SessionLocal
+from app.registry import get_reports
+from app.services.gather import gather_report
+from app.services.metrics import Counter
+from app.services.throttle import circuit_open, host_of
+from app.workers.registry import get_worker
+
+
+logger = logging.getLogger(__name__)
+
+
+BACKFILL_CHUNKS = Counter("usda_backfill_chunks_total", "Backfill chunks worked, by outcome.", ["outcome"])
+
+PENDING, RUNNING, COMPLETED, FAILED = "pending", "running", "completed", "failed"
+
+
+def create_job(
+    db: Session,
+    report_id: str,
+    start_date: date,
+    end_date: date,
+    chunk_days: Optional[int] = None,
+    force: bool = False,
+) -> BackfillJob:
+    chunk_days = chunk_days or settings.backfill_chunk_days
+    job = BackfillJob(
+        report_id=report_id,
+        start_date=start_date,
+        end_date=end_date,
+        chunk_days=chunk_days,
+        force=force,
+        status=PENDING,
+        next_date=start_date,
+        chunks_total=math.ceil(((end_date - start_date).days + 1) / chunk_days),
+        chunks_done=0,
+        inserted=0,
+        skipped=0,
+        attempts=0,
+        active_seconds=0.0,
+    )
+    db.add(job)
+    return job
+
+
+def claim_job(db: Session, job_id: str, now: Optional[datetime] = None) -> bool:
+    """Mark a job running unless another runner holds it; only one of two concurrent claims succeeds."""
+    now = now or datetime.utcnow()
+    stale = now - timedelta(seconds=settings.backfill_stale_seconds)
+    claimed = (
+        db.query(BackfillJob)
+        .filter(
+            BackfillJob.id == job_id,
+            or_(
+                BackfillJob.status.in_([PENDING, FAILED]),
+                and_(BackfillJob.status == RUNNING, BackfillJob.heartbeat_at < stale),
+            ),
+        )
+        .update(
+            {
+                BackfillJob.status: RUNNING,
+                BackfillJob.attempts: BackfillJob.attempts + 1,
+                BackfillJob.heartbeat_at: now,
+                BackfillJob.last_error: None,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def run_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Work a job from its checkpoint to the end, one committed chunk at a time.
+
+    A chunk's versions are committed by the gather before the checkpoint
+    moves past it. A crash in between repeats that chunk on resume, where
+    the coverage index (or the version hash) makes it a no-op. No session
+    is held while a chunk is fetched. Returns the job as a dict, or None if
+    another runner holds it.
+    """
+    with SessionLocal() as db:
+        if not claim_job(db, job_id):
+            return None
+        job = db.get(BackfillJob, job_id)
+        if job.started_at is None:
+            job.started_at = datetime.utcnow()
+            db.commit()
+        report_id, next_date, end_date = job.report_id, job.next_date, job.end_date
+        chunk_days, force = job.chunk_days, job.force
+    report = next((r for r in get_reports() if r.report_id == report_id), None)
+    worker = get_worker(report_id)
+    if report is None or worker is None:
+        return _fail(job_id, "Report or worker not found")
+
+    while next_date <= end_date:
+        chunk_start = next_date
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        started = time.perf_counter()
+        try:
+            with _Heartbeat(job_id):
+                result = gather_report(report, worker, chunk_start, chunk_end, force=force)
+        except Exception as exc:
+            BACKFILL_CHUNKS.inc(outcome="error")
+            logger.exception(
+                "backfill chunk failed",
+                extra={"job_id": job_id, "report_id": report_id, "chunk_start": chunk_start.isoformat()},
+            )
+            return _fail(job_id, str(exc), time.perf_counter() - started)
+        BACKFILL_CHUNKS.inc(outcome="ok")
+        next_date = chunk_end + timedelta(days=1)
+        _checkpoint(job_id, next_date, result, time.perf_counter() - started)
+
+    with SessionLocal() as db:
+        job = db.get(BackfillJob, job_id)
+        job.status = COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info("backfill completed", extra={"job_id": job_id, "report_id": report_id})
+        return job_to_dict(job)
+
+
+class _Heartbeat:
+    """Refresh the job's heartbeat from a thread while a chunk is gathered.
+
+    A chunk can take longer than BACKFILL_STALE_SECONDS; without this
+    resume_jobs would treat the job as abandoned and a second runner would
+    gather the same dates.
+    """
+
+    def __init__(self, job_id: str, interval: Optional[float] = None) -> None:
+        self.job_id = job_id
+        self.interval = interval if interval is not None else settings.backfill_stale_seconds / 4
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"backfill-heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with SessionLocal() as db:
+                    db.query(BackfillJob).filter(BackfillJob.id == self.job_id, BackfillJob.status == RUNNING).update(
+                        {BackfillJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+                    )
+                    db.commit()
+            except Exception:
+                logger.exception("backfill heartbeat failed", extra={"job_id": self.job_id})
+
+
+def _checkpoint(job_id: str, next_date: date, result: Dict[str, Any], seconds: float) -> None:
+    with SessionLocal() as db:
+        db.query(BackfillJob).filter(BackfillJob.id == job_id).update(
+            {
+                BackfillJob.next_date: next_date,
+                BackfillJob.chunks_done: BackfillJob.chunks_done + 1,
+                BackfillJob.inserted: BackfillJob.inserted + result["inserted"],
+                BackfillJob.skipped: BackfillJob.skipped + result["skipped"],
+                BackfillJob.active_seconds: BackfillJob.active_seconds + seconds,
+                BackfillJob.heartbeat_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+
+
+def resumable_job_ids(db: Session, now: Optional[datetime] = None) -> List[str]:
+    """Pending jobs, failed jobs due a retry, and running jobs whose runner stopped heartbeating."""
+    now = now or datetime.utcnow()
+    stale = now - timedelta(seconds=settings.backfill_stale_seconds)
+    rows = (
+        db.query(BackfillJob.id, BackfillJob.status, BackfillJob.attempts, BackfillJob.heartbeat_at)
+        .filter(
+            or_(
+                BackfillJob.status == PENDING,
+                and_(BackfillJob.status == FAILED, BackfillJob.attempts < settings.backfill_max_attempts),
+                and_(BackfillJob.status == RUNNING, BackfillJob.heartbeat_at < stale),
+            )
+        )
+        .order_by(BackfillJob.created_at)
+        .all()
+    )
+    return [
+        row.id
+        for row in rows
+        if row.status != FAILED or row.heartbeat_at is None or row.heartbeat_at + _retry_delay(row.attempts) <= now
+    ]
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """Wait after a job's ``attempts``-th failure: BACKFILL_RESUME_MINUTES, doubling with every further attempt."""
+    return timedelta(minutes=settings.backfill_resume_minutes * 2 ** max(0, attempts - 1))
+
+
+def resume_jobs() -> int:
+    """Scheduler entry point: run every resumable job in turn; returns how many finished.
+
+    Nothing is resumed while the USDA circuit is open, where every chunk would fail and use up an attempt.
+    """
+    if circuit_open(host_of(settings.usda_api_base)):
+        logger.info("backfill resume skipped; USDA circuit open")
+        return 0
+    with SessionLocal() as db:
+        job_ids = resumable_job_ids(db)
+    completed = 0
+    for job_id in job_ids:
+        result = run_job(job_id)
+        if result and result["status"] == COMPLETED:
+            completed += 1
+    return completed
+
+
+def _fail(job_id: str, message: str, seconds: float = 0.0) -> Dict[str, Any]:
+    # Data from earlier chunks stays committed; the next attempt starts at next_date.
+    with SessionLocal() as db:
+        job = db.get(BackfillJob, job_id)
+        job.status = FAILED
+        job.last_error = message
+        job.active_seconds += seconds
+        job.heartbeat_at = datetime.utcnow()
+        db.commit()
+        return job_to_dict(job)
+
+
+def job_to_dict(job: BackfillJob) -> Dict[str, Any]:
+    total_days = (job.end_date - job.start_date).days + 1
+    done_days = min(total_days, (job.next_date - job.start_date).days)
+    remaining_days = total_days - done_days
+    days_per_second: Optional[float] = None
+    versions_per_second: Optional[float] = None
+    if job.active_seconds:
+        days_per_second = done_days / job.active_seconds
+        versions_per_second = (job.inserted + job.skipped) / job.active_seconds
+    return {
+        "id": job.id,
+        "report_id": job.report_id,
+        "start_date": job.start_date.isoformat(),
+        "end_date": job.end_date.isoformat(),
+        "force": job.force,
+        "status": job.status,
+        "next_date": job.next_date.isoformat() if job.next_date <= job.end_date else None,
+        "chunk_days": job.chunk_days,
+        "chunks_done": job.chunks_done,
+        "chunks_total": job.chunks_total,
+        "inserted": job.inserted,
+        "skipped": job.skipped,
+        "attempts": job.attempts,
+        "last_error": job.last_error,
+        "throughput": {
+            "active_seconds": round(job.active_seconds, 3),
+            "days_per_second": round(days_per_second, 3) if days_per_second is not None else None,
+            "versions_per_second": round(versions_per_second, 3) if versions_per_second is not None else None,
+            "eta_seconds": round(remaining_days / days_per_second, 1) if days_per_second and remaining_days else None,
+        },
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, FrozenSet, List, Optional
+
+
+# Lower runs first.
+PRIORITY_WINDOW = 0
+PRIORITY_MANUAL = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {PRIORITY_WINDOW: "window", PRIORITY_MANUAL: "manual", PRIORITY_BACKGROUND: "background"}
+
+
+@dataclass
+class _Waiter:
+    priority: int
+    seq: int
+    key: Optional[str]
+    hosts: FrozenSet[str]
+    future: "asyncio.Future[None]" = field(repr=False)
+
+
+class PriorityLimiter:
+    """A concurrency limit that admits waiters by priority, then arrival, within per-host limits.
+
+    A waiter whose hosts are all at their limit is passed over, so a busy host
+    does not hold up runs against other hosts.
+    """
+
+    def __init__(self, limit: int, per_host_limit: Optional[int] = None) -> None:
+        self.limit = limit
+        self.per_host_limit = per_host_limit
+        self.active = 0
+        self.active_by_host: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: int, hosts: FrozenSet[str] = frozenset(), key: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        await self.acquire(priority, hosts, key)
+        try:
+            yield
+        finally:
+            self.release(hosts)
+
+    async def acquire(self, priority: int, hosts: FrozenSet[str] = frozenset(), key: Optional[str] = None) -> None:
+        waiter = _Waiter(priority, next(self._seq), key, hosts, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._wake()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as it was cancelled; hand the slot on.
+                self.release(hosts)
+            raise
+
+    def release(self, hosts: FrozenSet[str] = frozenset()) -> None:
+        self.active -= 1
+        for host in hosts:
+            self.active_by_host[host] -= 1
+        self._wake()
+
+    def promote(self, key: str, priority: int) -> None:
+        """Raise a queued waiter's priority, e.g. when a manual trigger joins a queued background run."""
+        for waiter in self._waiters:
+            if waiter.key == key and priority < waiter.priority:
+                waiter.priority = priority
+
+    def _fits(self, hosts: FrozenSet[str]) -> bool:
+        if self.active >= self.limit:
+            return False
+        if self.per_host_limit is None:
+            return True
+        return all(self.active_by_host.get(host, 0) < self.per_host_limit for host in hosts)
+
+    def _take(self, hosts: FrozenSet[str]) -> None:
+        self.active += 1
+        for host in hosts:
+            self.active_by_host[host] = self.active_by_host.get(host, 0) + 1
+
+    def _wake(self) -> None:
+        self._waiters.sort(key=lambda w: (w.priority, w.seq))
+        for waiter in list(self._waiters):
+            if self.active >= self.limit:
+                return
+            if waiter.future.done() or not self._fits(waiter.hosts):
+                continue
+            self._waiters.remove(waiter)
+            self._take(waiter.hosts)
+            waiter.future.set_result(None)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models import ReportCoverage
+from app.services.market_calendar import MarketCalendar
+
+
+def record_coverage(db: Session, report_id: str, report_date: date, status: str = "version") -> None:
+    """Mark a date as covered; a stored version replaces an earlier "empty" mark."""
+    coverage = db.get(ReportCoverage, (report_id, report_date))
+    if coverage is None:
+        db.add(
+            ReportCoverage(report_id=report_id, report_date=report_date, status=status, updated_at=datetime.utcnow())
+        )
+    elif status == "version" and coverage.status != "version":
+        coverage.status = status
+        coverage.updated_at = datetime.utcnow()
+
+
+def covered_dates(db: Session, report_id: str, start_date: date, end_date: date) -> Set[date]:
+    rows = (
+        db.query(ReportCoverage.report_date)
+        .filter(
+            ReportCoverage.report_id == report_id,
+            ReportCoverage.report_date >= start_date,
+            ReportCoverage.report_date <= end_date,
+        )
+        .all()
+    )
+    return {row.report_date for row in rows}
+
+
+def missing_ranges(
+    covered: Set[date], start_date: date, end_date: date, calendar: MarketCalendar
+) -> List[Tuple[date, date]]:
+    """Publication days in ``start_date..end_date`` without coverage, as inclusive sub-ranges.
+
+    Missing days separated only by weekends or holidays share a sub-range, so
+    a run of gaps costs one range query rather than one per week.
+    """
+    ranges: List[Tuple[date, date]] = []
+    day = start_date
+    while day <= end_date:
+        if calendar.is_publication_day(day) and day not in covered:
+            if ranges and calendar.previous_publication_day(day) <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], day)
+            else:
+                ranges.append((day, day))
+        day += timedelta(days=1)
+    return ranges
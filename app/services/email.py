@@ -35,13 +35,13 @@ class EmailService:
             body_html=html_template.render(**context),
         )
 
-    def send(self, recipients: List[str], payload: EmailPayload) -> None:
+    def send(self, recipients: List[str], payload: EmailPayload) -> bool:
         if not self.enabled:
-            return
+            return False
         if not recipients:
-            return
+            return False
         if not self.client:
-            return
+            return False
         self.client.send_email(
             Source=settings.ses_sender,
             Destination={"ToAddresses": recipients},
@@ -53,3 +53,4 @@ class EmailService:
                 },
             },
         )
+        return True
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from app.config import settings
+
+
+T = TypeVar("T")
+
+# "inline" runs on the event loop, "io" on a thread pool, "cpu" on a process pool (or threads, per settings).
+EXECUTOR_KINDS = ("inline", "io", "cpu")
+
+_executors: Dict[str, Executor] = {}
+
+
+def get_executor(kind: str) -> Executor:
+    if kind not in ("io", "cpu"):
+        raise ValueError(f"No executor for kind: {kind}")
+    executor = _executors.get(kind)
+    if executor is None:
+        if kind == "cpu" and settings.cpu_executor == "process":
+            # spawn keeps the children free of the scheduler and server threads running in this process.
+            executor = ProcessPoolExecutor(
+                max_workers=settings.cpu_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        elif kind == "cpu":
+            executor = ThreadPoolExecutor(max_workers=settings.cpu_workers, thread_name_prefix="cpu")
+        else:
+            executor = ThreadPoolExecutor(max_workers=settings.io_workers, thread_name_prefix="io")
+        _executors[kind] = executor
+    return executor
+
+
+def uses_processes(kind: str) -> bool:
+    return kind == "cpu" and settings.cpu_executor == "process"
+
+
+async def run_in_executor(kind: str, func: Callable[..., T], *args: Any) -> T:
+    """Run ``func(*args)`` on the executor for ``kind``.
+
+    Work sent to a process executor must be module-level and have picklable
+    arguments. Prefer bytes over decoded structures, which are much cheaper to
+    pickle.
+    """
+    if kind == "inline" or (kind == "cpu" and settings.cpu_executor == "inline"):
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    if uses_processes(kind):
+        return await loop.run_in_executor(get_executor(kind), functools.partial(func, *args))
+    # Threads see the caller's context variables (e.g. the active run timings), as with asyncio.to_thread.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(kind), functools.partial(context.run, func, *args))
+
+
+def shutdown_executors() -> None:
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
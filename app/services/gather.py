@@ -1,12 +1,134 @@
 from __future__ import annotations
 
+import logging
 from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 import httpx
 
-from app.registry import EndpointConfig, ReportConfig
+from app.config import settings
+from app.db.models import ReportVersion
+from app.db.session import SessionLocal
+from app.registry import EndpointConfig, ReportConfig, get_reports
+from app.services.coverage import covered_dates, missing_ranges, record_coverage
+from app.services.json_stream import iter_result_rows
+from app.services.market_calendar import get_calendar
+from app.services.throttle import admit_sync, record_outcome
+from app.workers.base import BaseWorker
+from app.workers.hg201_cme_index import HG201CmeIndexWorker
+from app.workers.registry import get_worker
+
+
+logger = logging.getLogger(__name__)
+
+
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def gather_report(
+    report: ReportConfig, worker: BaseWorker, start_date: date, end_date: date, force: bool = False
+) -> Dict[str, Any]:
+    """Store versions for ``start_date..end_date``, fetching only the days the coverage index lacks.
+
+    ``force`` refetches and reprocesses the whole range. Each fetched
+    sub-range is written and committed on its own.
+    """
+    if force:
+        ranges = [(start_date, end_date)]
+    else:
+        with SessionLocal() as db:
+            covered = covered_dates(db, report.report_id, start_date, end_date)
+        ranges = missing_ranges(covered, start_date, end_date, get_calendar())
+    inserted = 0
+    skipped = 0
+    for range_start, range_end in ranges:
+        range_inserted, range_skipped = gather_range(report, worker, range_start, range_end)
+        inserted += range_inserted
+        skipped += range_skipped
+    return {
+        "status": "ok",
+        "inserted": inserted,
+        "skipped": skipped,
+        "fetched_ranges": [[start.isoformat(), end.isoformat()] for start, end in ranges],
+    }
+
+
+def gather_range(report: ReportConfig, worker: BaseWorker, start_date: date, end_date: date) -> Tuple[int, int]:
+    """Fetch one range, store a version per new (date, payload) and update coverage; returns (inserted, skipped)."""
+    calendar = get_calendar()
+    # Reports computed against the prior reported day need that day's rows for the first date in range.
+    fetch_start = calendar.previous_publication_day(start_date) if report.needs_prior_day else start_date
+    hg201 = isinstance(worker, HG201CmeIndexWorker)
+    rows: List[Dict[str, object]] = []
+    if hg201:
+        rows = fetch_range_rows(report, fetch_start, end_date)
+        payloads_by_date = {day: [rows] for day in group_rows_by_date(rows)}
+    else:
+        payloads_by_date = fetch_range_payloads(report, fetch_start, end_date)
+
+    inserted = 0
+    skipped = 0
+    with SessionLocal() as db:
+        for report_date, payloads in sorted(payloads_by_date.items()):
+            if not start_date <= report_date <= end_date:
+                continue
+            if hg201:
+                parsed_fields = _compute_hg201_day(rows, report_date)
+                payload_hash = worker.compute_hash_from_payloads([rows])
+            else:
+                parsed_fields = worker._parse(payloads, report_date)
+                payload_hash = worker.compute_hash_from_payloads(payloads)
+            record_coverage(db, report.report_id, report_date)
+            matching = worker._find_version_fields(db, report_date, payload_hash)
+            if matching:
+                version_id, existing_fields = matching
+                worker._merge_into_version(db, version_id, existing_fields, parsed_fields)
+                skipped += 1
+                continue
+            version = ReportVersion(
+                report_id=report.report_id,
+                report_date=report_date,
+                payload_hash=payload_hash,
+                parsed_fields=parsed_fields,
+                raw_payload={"payloads": payloads},
+            )
+            db.add(version)
+            inserted += 1
+        latest = max(payloads_by_date, default=None)
+        if latest is not None:
+            for day in _date_range(start_date, min(end_date, latest)):
+                # USDA has published a later day, so a publication day still without rows is not coming.
+                if day not in payloads_by_date and calendar.is_publication_day(day):
+                    record_coverage(db, report.report_id, day, status="empty")
+        db.commit()
+    return inserted, skipped
+
+
+def fill_gaps(days: Optional[int] = None, today: Optional[date] = None) -> Dict[str, Dict[str, Any]]:
+    """Nightly: gather the missing days of the last ``days`` (GAP_FILL_DAYS) for every report that supports it."""
+    days = settings.gap_fill_days if days is None else days
+    end_date = (today or datetime.now(tz=ZoneInfo(settings.app_timezone)).date()) - timedelta(days=1)
+    start_date = end_date - timedelta(days=days - 1)
+    results: Dict[str, Dict[str, Any]] = {}
+    for report in get_reports():
+        if any(endpoint.absolute_url for endpoint in report.endpoints):
+            continue
+        worker = get_worker(report.report_id)
+        if not worker:
+            continue
+        try:
+            results[report.report_id] = gather_report(report, worker, start_date, end_date)
+        except Exception:
+            logger.exception("gap fill failed", extra={"report_id": report.report_id})
+    logger.info("gap fill finished", extra={"results": results})
+    return results
+
+
+def _compute_hg201_day(rows: List[Dict[str, Any]], report_date: date) -> Dict[str, Any]:
+    worker = HG201CmeIndexWorker.__new__(HG201CmeIndexWorker)
+    return worker.compute_index_for_date(rows, report_date)
 
 
 def _date_range(start_date: date, end_date: date) -> List[date]:
@@ -30,17 +152,8 @@ def fetch_range_payloads(
     with httpx.Client(timeout=timeout) as client:
         for endpoint in config.endpoints:
             url = _build_range_url(endpoint, start_date, end_date)
-            resp = client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            if isinstance(data, dict) and isinstance(data.get("results"), list):
-                rows = data["results"]
-            elif isinstance(data, list):
-                rows = data
-            else:
-                rows = []
             grouped: Dict[date, List[Dict[str, object]]] = defaultdict(list)
-            for row in rows:
+            for row in _stream_rows(client, url):
                 report_date = _parse_row_date(row)
                 if not report_date:
                     continue
@@ -56,16 +169,25 @@ def fetch_range_rows(config: ReportConfig, start_date: date, end_date: date) ->
     with httpx.Client(timeout=timeout) as client:
         for endpoint in config.endpoints:
             url = _build_range_url(endpoint, start_date, end_date)
-            resp = client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            if isinstance(data, dict) and isinstance(data.get("results"), list):
-                rows.extend(data["results"])
-            elif isinstance(data, list):
-                rows.extend(data)
+            rows.extend(_stream_rows(client, url))
     return rows
 
 
+def _stream_rows(client: httpx.Client, url: str) -> Iterator[Dict[str, object]]:
+    # Range responses can span years; decode rows as chunks arrive instead of buffering the body.
+    host = admit_sync(url)
+    try:
+        with client.stream("GET", url) as resp:
+            record_outcome(host, resp.status_code)
+            resp.raise_for_status()
+            for row in iter_result_rows(resp.iter_text(_STREAM_CHUNK_SIZE)):
+                if isinstance(row, dict):
+                    yield row
+    except httpx.TransportError:
+        record_outcome(host, None)
+        raise
+
+
 def group_rows_by_date(rows: List[Dict[str, object]]) -> Dict[date, List[Dict[str, object]]]:
     grouped: Dict[date, List[Dict[str, object]]] = defaultdict(list)
     for row in rows:
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import AbstractSet, Any, Dict, List
+
+
+_ITEM_SEPARATOR = b", "
+_ROW_BATCH = 512
+
+_encoder = json.JSONEncoder(sort_keys=True, default=str)
+
+
+def payload_hash(payloads: List[List[Dict[str, Any]]], exclude_fields: AbstractSet[str] = frozenset()) -> str:
+    """sha256 of ``json.dumps(payloads, sort_keys=True, default=str)``, fed in row batches.
+
+    Rows are encoded in batches with the C encoder and the list punctuation is
+    written around them, so the digest matches the whole-document form without
+    ever building it. Top-level row keys in ``exclude_fields`` are left out.
+    """
+    digest = hashlib.sha256()
+    update = digest.update
+    update(b"[")
+    for payload_idx, payload in enumerate(payloads):
+        if payload_idx:
+            update(_ITEM_SEPARATOR)
+        if not isinstance(payload, list):
+            update(_encode(payload, exclude_fields))
+            continue
+        update(b"[")
+        for start in range(0, len(payload), _ROW_BATCH):
+            if start:
+                update(_ITEM_SEPARATOR)
+            # Encoding a slice yields "[r1, r2, ...]"; dropping its brackets keeps the rows' bytes canonical.
+            update(_encode(payload[start : start + _ROW_BATCH], exclude_fields)[1:-1])
+        update(b"]")
+    update(b"]")
+    return digest.hexdigest()
+
+
+def _encode(value: Any, exclude_fields: AbstractSet[str]) -> bytes:
+    if exclude_fields:
+        if isinstance(value, dict):
+            value = _without(value, exclude_fields)
+        elif isinstance(value, list):
+            value = [_without(item, exclude_fields) if isinstance(item, dict) else item for item in value]
+    # ensure_ascii is on, so the encoded text is plain ASCII.
+    return _encoder.encode(value).encode("ascii")
+
+
+def _without(row: Dict[str, Any], exclude_fields: AbstractSet[str]) -> Dict[str, Any]:
+    return {key: item for key, item in row.items() if key not in exclude_fields}
@@ -1,9 +1,341 @@
 from __future__ import annotations
 
+import asyncio
+import re
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
 import httpx
 
+from app.config import settings
+from app.services.metrics import Counter, Histogram, RunTimings, current_timings
+from app.services.throttle import CircuitOpenError, admit, record_abandoned, record_outcome
+
+
+# httpcore trace events mapped to run stages. connect includes DNS resolution, which httpcore does not report apart.
+_TRACE_STAGES = {
+    "connection.connect_tcp": "connect",
+    "connection.start_tls": "tls",
+    "http11.send_request_headers": "wait",
+    "http11.send_request_body": "wait",
+    "http11.receive_response_headers": "wait",
+    "http11.receive_response_body": "download",
+    "http2.send_request_headers": "wait",
+    "http2.send_request_body": "wait",
+    "http2.receive_response_headers": "wait",
+    "http2.receive_response_body": "download",
+}
+
+
+HTTP_COALESCED = Counter(
+    "usda_http_coalesced_total",
+    "Requests answered without a network call: joined an identical in-flight request, or served from the cache.",
+    ["source"],
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "usda_http_request_seconds",
+    "Time from sending a USDA request to reading the whole response, for 2xx answers.",
+    ["endpoint"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0),
+)
+HTTP_HEDGED = Counter(
+    "usda_http_hedged_total",
+    "Duplicate requests sent after the first passed the endpoint's p95, by which one answered first.",
+    ["winner"],
+)
+HTTP_WARMUPS = Counter(
+    "usda_http_warmups_total", "Connections opened ahead of polling windows, by whether the host answered.", ["outcome"]
+)
+
+# Recent successful latencies kept per endpoint for percentiles.
+LATENCY_WINDOW = 200
+# A report_date query spanning days, e.g. q=report_date=01/05/2026:01/09/2026.
+_DATE_RANGE = re.compile(r"report_date=[^&;]*:")
+
+RequestKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SharedClient]" = weakref.WeakKeyDictionary()
+
+
+def get_client() -> "SharedClient":
+    """The process-wide client for the running event loop.
+
+    Still used as ``async with get_client() as client``; leaving the block
+    keeps the client and its connections open for the next caller.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = SharedClient()
+        _clients[loop] = client
+    return client
+
+
+async def close_clients() -> None:
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
+
+
+def endpoint_of(url: str) -> str:
+    """Scheme, host and path, plus ``[range]`` for multi-day ``report_date`` queries.
+
+    The dates in the query do not change how slow an endpoint is, but a range
+    returns many days of rows, so it keeps its own latency history.
+    """
+    parts = urlsplit(url)
+    endpoint = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    if _DATE_RANGE.search(unquote(parts.query)):
+        endpoint += "[range]"
+    return endpoint
+
+
+class _LeaderCancelled(Exception):
+    """Set on a shared request whose leading caller was cancelled before the response arrived."""
+
+
+class EndpointLatency:
+    """A sliding window of successful request times for one endpoint."""
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+        self.samples: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.samples) >= max(1, settings.http_latency_min_samples)
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        HTTP_REQUEST_SECONDS.observe(seconds, endpoint=self.endpoint)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def read_timeout(self) -> float:
+        """The configured ceiling until there is enough history, then p99 times the multiplier within bounds."""
+        ceiling = settings.http_read_timeout_seconds
+        if not self.ready:
+            return ceiling
+        adaptive = self.percentile(0.99) * settings.http_timeout_multiplier
+        return min(ceiling, max(settings.http_read_timeout_min_seconds, adaptive))
+
+    def hedge_after(self) -> Optional[float]:
+        if not settings.http_hedge_requests or not self.ready:
+            return None
+        return self.percentile(0.95)
+
+
+class SharedClient:
+    """An AsyncClient that sends identical concurrent GET/HEAD requests once and briefly caches 2xx responses.
+
+    Requests that do go out are admitted by the per-host rate limiter and
+    circuit breaker in app.services.throttle. Read timeouts adapt to each
+    endpoint's recent latency, and with HTTP_HEDGE_REQUESTS a request still
+    pending at the endpoint's p95 is sent again and the first answer is used.
+
+    Requests are identical when method, URL and headers match. Callers share
+    the same ``httpx.Response`` (body already read), so they must not modify it.
+    """
+
+    def __init__(self) -> None:
+        timeout = httpx.Timeout(connect=5.0, read=settings.http_read_timeout_seconds, write=5.0, pool=5.0)
+        limits = httpx.Limits(
+            max_keepalive_connections=5, max_connections=10, keepalive_expiry=settings.http_keepalive_seconds
+        )
+        self._client = httpx.AsyncClient(timeout=timeout, limits=limits, event_hooks={"request": [_attach_trace]})
+        self._inflight: Dict[RequestKey, "asyncio.Future[httpx.Response]"] = {}
+        self._cache: "OrderedDict[RequestKey, Tuple[float, httpx.Response]]" = OrderedDict()
+        self.latency: Dict[str, EndpointLatency] = {}
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def __aenter__(self) -> "SharedClient":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def get(self, url: str, headers: Optional[Mapping[str, str]] = None) -> httpx.Response:
+        return await self._request("GET", url, headers)
+
+    async def head(self, url: str, headers: Optional[Mapping[str, str]] = None) -> httpx.Response:
+        return await self._request("HEAD", url, headers)
+
+    async def warm(self, url: str, connections: int = 1) -> int:
+        """Open up to ``connections`` keep-alive connections to ``url``'s origin; returns how many are ready.
+
+        Each is a HEAD for ``/`` sent concurrently (not coalesced), so DNS,
+        TCP and TLS are paid now rather than by the next real request.
+        """
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}/"
+        results = await asyncio.gather(*[self._warm_one(origin) for _ in range(connections)], return_exceptions=True)
+        return sum(1 for result in results if result is True)
+
+    async def _warm_one(self, origin: str) -> bool:
+        try:
+            host = await admit(origin)
+        except CircuitOpenError:
+            HTTP_WARMUPS.inc(outcome="circuit_open")
+            return False
+        try:
+            response = await self._client.head(origin)
+        except httpx.HTTPError:
+            record_outcome(host, None)
+            HTTP_WARMUPS.inc(outcome="error")
+            return False
+        # Any answer, even a 404 for /, leaves the connection in the pool.
+        record_outcome(host, response.status_code)
+        HTTP_WARMUPS.inc(outcome="ok")
+        return True
+
+    async def _request(self, method: str, url: str, headers: Optional[Mapping[str, str]]) -> httpx.Response:
+        key: RequestKey = (method, url, tuple(sorted((headers or {}).items())))
+        cached = self._cached(key)
+        if cached is not None:
+            HTTP_COALESCED.inc(source="cache")
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            HTTP_COALESCED.inc(source="inflight")
+            try:
+                # Shielded: a follower giving up must not cancel the leader's request.
+                return await asyncio.shield(pending)
+            except _LeaderCancelled:
+                # Only the leader was cancelled; this caller still wants the response, so ask again.
+                return await self._request(method, url, headers)
+
+        future: "asyncio.Future[httpx.Response]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._fetch(method, url, headers)
+        except asyncio.CancelledError:
+            # Followers were not cancelled themselves; they get an ordinary exception and re-issue the request.
+            future.set_exception(_LeaderCancelled(url))
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Retrieved here so an error nobody else waited for is not reported as unhandled.
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            if response.is_success:
+                self._store(key, response)
+            return response
+        finally:
+            del self._inflight[key]
+
+    async def _fetch(self, method: str, url: str, headers: Optional[Mapping[str, str]]) -> httpx.Response:
+        endpoint = endpoint_of(url)
+        latency = self.latency.get(endpoint)
+        if latency is None:
+            latency = self.latency[endpoint] = EndpointLatency(endpoint)
+        hedge_after = latency.hedge_after()
+        if hedge_after is None:
+            return await self._send(method, url, headers, latency)
+
+        primary = asyncio.ensure_future(self._send(method, url, headers, latency))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if done:
+                return primary.result()
+            hedge = asyncio.ensure_future(self._send(method, url, headers, latency))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        HTTP_HEDGED.inc(winner="hedge" if task is hedge else "primary")
+                        return task.result()
+            # Both failed; report the original request's error.
+            HTTP_HEDGED.inc(winner="none")
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark a losing request's error as seen.
+                    task.exception()
+
+    async def _send(
+        self, method: str, url: str, headers: Optional[Mapping[str, str]], latency: EndpointLatency
+    ) -> httpx.Response:
+        host = await admit(url)
+        base = self._client.timeout
+        timeout = httpx.Timeout(connect=base.connect, read=latency.read_timeout(), write=base.write, pool=base.pool)
+        started = time.perf_counter()
+        try:
+            response = await self._client.request(method, url, headers=headers, timeout=timeout)
+        except asyncio.CancelledError:
+            record_abandoned(host)
+            raise
+        except httpx.ReadTimeout:
+            # Outlasting a read timeout shortened from recent latency shows a slow answer, not a failing host.
+            if timeout.read is not None and timeout.read < settings.http_read_timeout_seconds:
+                record_abandoned(host)
+            else:
+                record_outcome(host, None)
+            raise
+        except Exception:
+            record_outcome(host, None)
+            raise
+        record_outcome(host, response.status_code)
+        if response.is_success:
+            latency.observe(time.perf_counter() - started)
+        return response
+
+    def _cached(self, key: RequestKey) -> Optional[httpx.Response]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > settings.http_cache_ttl_seconds:
+            del self._cache[key]
+            return None
+        return response
+
+    def _store(self, key: RequestKey, response: httpx.Response) -> None:
+        if settings.http_cache_ttl_seconds <= 0:
+            return
+        self._cache[key] = (time.monotonic(), response)
+        self._cache.move_to_end(key)
+        while len(self._cache) > settings.http_cache_max_entries:
+            self._cache.popitem(last=False)
+
+
+async def _attach_trace(request: httpx.Request) -> None:
+    timings = current_timings()
+    if timings is not None:
+        request.extensions["trace"] = _Trace(timings)
+
+
+class _Trace:
+    def __init__(self, timings: RunTimings) -> None:
+        self.timings = timings
+        self.started: Dict[str, float] = {}
 
-def get_client() -> httpx.AsyncClient:
-    timeout = httpx.Timeout(connect=5.0, read=20.0, write=5.0, pool=5.0)
-    limits = httpx.Limits(max_keepalive_connections=5, max_connections=10)
-    return httpx.AsyncClient(timeout=timeout, limits=limits)
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        prefix, _, phase = event_name.rpartition(".")
+        stage_name = _TRACE_STAGES.get(prefix)
+        if stage_name is None:
+            return
+        if phase == "started":
+            self.started[prefix] = time.perf_counter()
+        elif prefix in self.started:
+            self.timings.record(stage_name, time.perf_counter() - self.started.pop(prefix))
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+
+_WHITESPACE = " \t\n\r"
+_CONTAINER_STARTS = '{["'
+
+
+class ResultsStreamDecoder:
+    """Incrementally decode the rows of a USDA MPR response.
+
+    Accepts either a top-level JSON array or an object carrying a ``results``
+    array. Text is pushed in with ``feed`` and complete rows are returned as
+    soon as they are available, so only one partial row is buffered at a time.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._top_level_array = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        rows = self._drain(final=True)
+        if self._state not in ("done", "ignore"):
+            raise ValueError("Truncated JSON response")
+        return rows
+
+    def _drain(self, final: bool) -> List[Any]:
+        rows: List[Any] = []
+        buf = self._buf
+        while True:
+            if self._state == "ignore":
+                self._pos = len(buf)
+                break
+            while self._pos < len(buf) and buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos >= len(buf):
+                break
+            ch = buf[self._pos]
+
+            if self._state == "start":
+                if ch == "[":
+                    self._top_level_array = True
+                    self._state = "array"
+                elif ch == "{":
+                    self._state = "object_key"
+                else:
+                    self._state = "ignore"
+                    continue
+                self._pos += 1
+            elif self._state == "object_key":
+                if ch == ",":
+                    self._pos += 1
+                elif ch == "}":
+                    self._pos += 1
+                    self._state = "done"
+                else:
+                    decoded = self._decode_value(final)
+                    if decoded is None:
+                        break
+                    self._key = str(decoded[0])
+                    self._state = "object_colon"
+            elif self._state == "object_colon":
+                if ch != ":":
+                    raise ValueError(f"Expected ':' at offset {self._pos}")
+                self._pos += 1
+                self._state = "object_value"
+            elif self._state == "object_value":
+                if self._key == "results" and ch == "[":
+                    self._pos += 1
+                    self._state = "array"
+                else:
+                    if self._decode_value(final) is None:
+                        break
+                    self._state = "object_key"
+            elif self._state == "array":
+                if ch == ",":
+                    self._pos += 1
+                elif ch == "]":
+                    self._pos += 1
+                    self._state = "done" if self._top_level_array else "object_key"
+                else:
+                    decoded = self._decode_value(final)
+                    if decoded is None:
+                        break
+                    rows.append(decoded[0])
+            else:
+                # Trailing content after the document is ignored, as with resp.json() callers
+                # that only ever look at the first value.
+                self._pos = len(buf)
+                break
+        return rows
+
+    def _decode_value(self, final: bool) -> Optional[Tuple[Any]]:
+        buf = self._buf
+        try:
+            value, end = self._decoder.raw_decode(buf, self._pos)
+        except json.JSONDecodeError as exc:
+            if final:
+                raise ValueError(f"Invalid JSON response: {exc}") from exc
+            return None
+        # A bare number or literal that ends exactly at the buffer edge may continue in the next chunk.
+        if end >= len(buf) and not final and buf[self._pos] not in _CONTAINER_STARTS:
+            return None
+        self._pos = end
+        return (value,)
+
+
+def iter_result_rows(chunks: Iterable[str]) -> Iterator[Any]:
+    decoder = ResultsStreamDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from app.config import settings
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Federal observance: Saturday holidays move to Friday, Sunday holidays to Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+MON, THU = 0, 3
+
+# Federal holidays, on which USDA Market News issues no mandatory livestock reports. Each rule gives the
+# observed date for a year, or None when the holiday did not exist yet.
+HOLIDAY_RULES: Dict[str, Callable[[int], Optional[date]]] = {
+    "new_years_day": lambda year: _observed(date(year, 1, 1)),
+    "mlk_day": lambda year: _nth_weekday(year, 1, MON, 3),
+    "presidents_day": lambda year: _nth_weekday(year, 2, MON, 3),
+    "memorial_day": lambda year: _last_weekday(year, 5, MON),
+    "juneteenth": lambda year: _observed(date(year, 6, 19)) if year >= 2021 else None,
+    "independence_day": lambda year: _observed(date(year, 7, 4)),
+    "labor_day": lambda year: _nth_weekday(year, 9, MON, 1),
+    "columbus_day": lambda year: _nth_weekday(year, 10, MON, 2),
+    "veterans_day": lambda year: _observed(date(year, 11, 11)),
+    "thanksgiving": lambda year: _nth_weekday(year, 11, THU, 4),
+    "christmas": lambda year: _observed(date(year, 12, 25)),
+}
+
+
+class MarketCalendar:
+    """Days USDA publishes: weekdays that are not holidays.
+
+    ``skip_rules`` names HOLIDAY_RULES to ignore, ``closed`` adds one-off
+    closures and ``open_dates`` marks days that publish despite the rules.
+    Holidays are computed once per year.
+    """
+
+    def __init__(
+        self,
+        skip_rules: Iterable[str] = (),
+        closed: Iterable[date] = (),
+        open_dates: Iterable[date] = (),
+    ) -> None:
+        skipped = set(skip_rules)
+        unknown = skipped - set(HOLIDAY_RULES)
+        if unknown:
+            raise ValueError(f"Unknown holiday rules: {', '.join(sorted(unknown))}")
+        self.rules = {name: rule for name, rule in HOLIDAY_RULES.items() if name not in skipped}
+        self.closed: FrozenSet[date] = frozenset(closed)
+        self.open_dates: FrozenSet[date] = frozenset(open_dates)
+        self._years: Dict[int, Dict[date, str]] = {}
+
+    def holidays(self, year: int) -> Dict[date, str]:
+        """Non-publication weekdays in ``year`` and their names."""
+        holidays = self._years.get(year)
+        if holidays is None:
+            holidays = {}
+            # New Year's Day on a Saturday is observed on December 31 of the year before.
+            for rule_year in (year, year + 1):
+                for name, rule in self.rules.items():
+                    day = rule(rule_year)
+                    if day is not None and day.year == year:
+                        holidays[day] = name
+            for day in self.closed:
+                if day.year == year:
+                    holidays.setdefault(day, "closed")
+            self._years[year] = holidays
+        return holidays
+
+    def holiday_name(self, day: date) -> Optional[str]:
+        if day in self.open_dates:
+            return None
+        if day.weekday() >= 5:
+            return "weekend"
+        return self.holidays(day.year).get(day)
+
+    def is_publication_day(self, day: date) -> bool:
+        return self.holiday_name(day) is None
+
+    def previous_publication_day(self, day: date) -> date:
+        day -= timedelta(days=1)
+        while not self.is_publication_day(day):
+            day -= timedelta(days=1)
+        return day
+
+
+def _dates(value: str) -> List[date]:
+    return [date.fromisoformat(item.strip()) for item in value.split(",") if item.strip()]
+
+
+@lru_cache(maxsize=1)
+def get_calendar() -> MarketCalendar:
+    return MarketCalendar(
+        skip_rules=[name.strip() for name in settings.market_holiday_skip_rules.split(",") if name.strip()],
+        closed=_dates(settings.market_closed_dates),
+        open_dates=_dates(settings.market_open_dates),
+    )
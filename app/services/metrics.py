@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import abc
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]: ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A settable gauge, or one read at scrape time from ``callback`` (unlabelled only)."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        if self._callback is not None:
+            return [f"{self.name} {self._callback()}"]
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def _samples(self) -> List[str]:
+        lines: List[str] = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{self._labels(key, _le(bound))} {cumulative}")
+                cumulative += counts[-1]
+                lines.append(f"{self.name}_bucket{self._labels(key, _le('+Inf'))} {cumulative}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {self._sums[key]}")
+                lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+_REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _le(bound: object) -> str:
+    return 'le="' + str(bound) + '"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+WORKER_STAGE_SECONDS = Histogram(
+    "usda_worker_stage_seconds", "Time spent per stage of a worker run.", ["report_id", "stage"]
+)
+WORKER_RUN_SECONDS = Histogram("usda_worker_run_seconds", "Wall time of a worker run.", ["report_id"])
+
+
+class RunTimings:
+    """Stage durations for one worker run, accumulated across repeated stages."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def record(self, stage_name: str, seconds: float) -> None:
+        self.stages[stage_name] = self.stages.get(stage_name, 0.0) + seconds
+
+    def merge(self, stages: Dict[str, float]) -> None:
+        for stage_name, seconds in stages.items():
+            self.record(stage_name, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {stage_name: round(seconds, 6) for stage_name, seconds in self.stages.items()}
+
+    @contextmanager
+    def activate(self) -> Iterator["RunTimings"]:
+        token = _current_timings.set(self)
+        try:
+            yield self
+        finally:
+            _current_timings.reset(token)
+
+    def observe(self, report_id: str) -> None:
+        for stage_name, seconds in self.stages.items():
+            WORKER_STAGE_SECONDS.observe(seconds, report_id=report_id, stage=stage_name)
+        WORKER_RUN_SECONDS.observe(time.perf_counter() - self.started, report_id=report_id)
+
+
+_current_timings: contextvars.ContextVar[Optional[RunTimings]] = contextvars.ContextVar(
+    "current_timings", default=None
+)
+
+
+def current_timings() -> Optional[RunTimings]:
+    return _current_timings.get()
+
+
+@contextmanager
+def stage(stage_name: str) -> Iterator[None]:
+    """Time a block against the active run, if any."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(stage_name, time.perf_counter() - started)
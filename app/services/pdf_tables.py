@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+
+
+_PAGE_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class TableTemplate:
+    """Column layout of a table printed in an AMS PDF report.
+
+    ``headers`` are the labels as printed and ``fields`` the keys each column
+    is returned under. Only lines whose first column matches ``row_label``
+    are returned as rows.
+    """
+
+    name: str
+    headers: Tuple[str, ...]
+    fields: Tuple[str, ...]
+    row_label: re.Pattern
+    y_tolerance: float = 3.0
+
+    def __post_init__(self) -> None:
+        if len(self.headers) != len(self.fields):
+            raise ValueError(f"Template {self.name} has {len(self.headers)} headers for {len(self.fields)} fields")
+
+
+@dataclass(frozen=True)
+class _Column:
+    field: str
+    left: float
+    right: float
+
+
+_page_cache: "OrderedDict[Tuple[str, str], List[Dict[str, str]]]" = OrderedDict()
+
+
+def extract_table_rows(content: bytes, template: TableTemplate) -> List[Dict[str, str]]:
+    """Return the rows of every ``template`` table in the PDF, in page order.
+
+    Words are assigned to columns by their x position under the located
+    header, so values stay aligned when spacing or wrapping shifts. Pages are
+    keyed by a hash of their content streams, and layout analysis only runs
+    for pages not seen before.
+    """
+    rows: List[Dict[str, str]] = []
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        for page in pdf.pages:
+            key = (template.name, _page_content_hash(page))
+            page_rows = _page_cache.get(key)
+            if page_rows is None:
+                page_rows = _extract_page_rows(page, template)
+                _page_cache[key] = page_rows
+                if len(_page_cache) > _PAGE_CACHE_SIZE:
+                    _page_cache.popitem(last=False)
+            else:
+                _page_cache.move_to_end(key)
+            rows.extend(dict(row) for row in page_rows)
+    return rows
+
+
+def _page_content_hash(page: Any) -> str:
+    digest = hashlib.sha256()
+    contents = page.page_obj.contents or []
+    for stream in contents:
+        resolved = resolve1(stream)
+        data = resolved.get_data() if hasattr(resolved, "get_data") else repr(resolved).encode("utf-8")
+        digest.update(data)
+    digest.update(repr(page.bbox).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _extract_page_rows(page: Any, template: TableTemplate) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    columns: Optional[List[_Column]] = None
+    for line in _group_lines(page.extract_words(), template.y_tolerance):
+        header = _locate_header(line, template)
+        if header:
+            columns = header
+            continue
+        if columns is None:
+            continue
+        row = _assign_columns(line, columns)
+        if template.row_label.match(row.get(template.fields[0], "")):
+            rows.append(row)
+    return rows
+
+
+def _group_lines(words: Sequence[Dict[str, Any]], tolerance: float) -> List[List[Dict[str, Any]]]:
+    lines: List[List[Dict[str, Any]]] = []
+    line_top: Optional[float] = None
+    for word in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if line_top is None or abs(word["top"] - line_top) > tolerance:
+            lines.append([])
+            line_top = word["top"]
+        lines[-1].append(word)
+    return [sorted(line, key=lambda w: w["x0"]) for line in lines]
+
+
+def _locate_header(line: List[Dict[str, Any]], template: TableTemplate) -> Optional[List[_Column]]:
+    texts = [word["text"] for word in line]
+    spans: List[Tuple[float, float]] = []
+    idx = 0
+    for header in template.headers:
+        tokens = header.split()
+        while idx + len(tokens) <= len(texts) and texts[idx : idx + len(tokens)] != tokens:
+            idx += 1
+        if idx + len(tokens) > len(texts):
+            return None
+        spans.append((line[idx]["x0"], line[idx + len(tokens) - 1]["x1"]))
+        idx += len(tokens)
+
+    columns: List[_Column] = []
+    for pos, (x0, x1) in enumerate(spans):
+        # Each column reaches halfway to its neighbours' headers, which covers left-, right- and centre-aligned values.
+        left = (spans[pos - 1][1] + x0) / 2 if pos > 0 else float("-inf")
+        right = (x1 + spans[pos + 1][0]) / 2 if pos + 1 < len(spans) else float("inf")
+        columns.append(_Column(field=template.fields[pos], left=left, right=right))
+    return columns
+
+
+def _assign_columns(line: List[Dict[str, Any]], columns: List[_Column]) -> Dict[str, str]:
+    cells: Dict[str, List[str]] = {column.field: [] for column in columns}
+    for word in line:
+        center = (word["x0"] + word["x1"]) / 2
+        for column in columns:
+            if column.left <= center < column.right:
+                cells[column.field].append(word["text"])
+                break
+    return {field: " ".join(parts) for field, parts in cells.items()}
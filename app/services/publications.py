@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import ReportPublication
+from app.services.metrics import Histogram
+
+
+PUBLISHED_KEYS = ["published_date", "publish_date", "published date", "Published Date"]
+REPORT_DATE_KEYS = ["report_date", "report date", "reportdate", "Report Date"]
+PUBLISHED_FORMATS = ["%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]
+
+PUBLICATION_EMAIL_SECONDS = Histogram(
+    "usda_publication_email_seconds",
+    "Time from USDA publication to the report email being sent.",
+    ["report_id"],
+    buckets=(30, 60, 120, 300, 600, 900, 1800, 3600, 7200),
+)
+
+
+def published_at_from_payloads(
+    payloads: List[List[Dict[str, Any]]], report_date: date, tz: ZoneInfo
+) -> Optional[datetime]:
+    """USDA's own publication timestamp for ``report_date``, as naive UTC, from the first of its rows carrying one.
+
+    Range and multi-day payloads also hold earlier days, whose timestamps are
+    skipped; rows without a report date are taken as the version's. The
+    datamart reports local market time without an offset, so it is read in ``tz``.
+    """
+    for rows in payloads:
+        for row in rows:
+            row_date = _row_report_date(row)
+            if row_date is not None and row_date != report_date:
+                continue
+            for key in PUBLISHED_KEYS:
+                value = row.get(key)
+                if not value:
+                    continue
+                for fmt in PUBLISHED_FORMATS:
+                    try:
+                        local = datetime.strptime(str(value).strip(), fmt).replace(tzinfo=tz)
+                    except ValueError:
+                        continue
+                    return local.astimezone(timezone.utc).replace(tzinfo=None)
+    return None
+
+
+def _row_report_date(row: Dict[str, Any]) -> Optional[date]:
+    for key in REPORT_DATE_KEYS:
+        value = row.get(key)
+        if value:
+            try:
+                return datetime.strptime(str(value).strip()[:10], "%m/%d/%Y").date()
+            except ValueError:
+                return None
+    return None
+
+
+def record_detection(
+    db: Session,
+    report_id: str,
+    report_date: date,
+    published_at: Optional[datetime],
+    detected_at: datetime,
+) -> None:
+    """Add the publication row for the first version seen for a report date; later revisions keep it.
+
+    A date older than the latest recorded publication (a late revision found
+    in the search window) gets no row: its detection time would not measure
+    how quickly the publication was seen.
+    """
+    if db.get(ReportPublication, (report_id, report_date)):
+        return
+    latest = db.query(func.max(ReportPublication.report_date)).filter(ReportPublication.report_id == report_id).scalar()
+    if latest is not None and report_date < latest:
+        return
+    db.add(
+        ReportPublication(
+            report_id=report_id,
+            report_date=report_date,
+            published_at=published_at or detected_at,
+            published_source="api" if published_at else "first_poll",
+            detected_at=detected_at,
+        )
+    )
+
+
+def record_email(db: Session, report_id: str, report_date: date, emailed_at: datetime) -> None:
+    publication = db.get(ReportPublication, (report_id, report_date))
+    if not publication or publication.emailed_at:
+        return
+    publication.emailed_at = emailed_at
+    if publication.published_source != "api":
+        return
+    PUBLICATION_EMAIL_SECONDS.observe(
+        max(0.0, (emailed_at - publication.published_at).total_seconds()), report_id=report_id
+    )
+
+
+def latency_summary(publications: Sequence[ReportPublication]) -> Dict[str, Any]:
+    # first_poll rows take published_at from the detection itself, so only api rows measure latency.
+    timestamped = [p for p in publications if p.published_source == "api"]
+    detection = [(p.detected_at - p.published_at).total_seconds() for p in timestamped]
+    email = [(p.emailed_at - p.published_at).total_seconds() for p in timestamped if p.emailed_at]
+    return {
+        "count": len(publications),
+        "api_timestamped": len(detection),
+        "detection_seconds": _percentiles(detection),
+        "email_seconds": _percentiles(email),
+    }
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    return {"p50": _percentile(ordered, 0.5), "p95": _percentile(ordered, 0.95)}
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    # Linear interpolation between closest ranks, matching Postgres percentile_cont.
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction: float = position - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def predicted_publication_times(
+    publications: Sequence[ReportPublication], tz: ZoneInfo, min_samples: int = 3
+) -> Dict[str, time]:
+    """Median local time of day each report has been published, from USDA's own timestamps.
+
+    Reports with fewer than ``min_samples`` API-timestamped publications get no prediction.
+    """
+    seconds_by_report: Dict[str, List[float]] = {}
+    for publication in publications:
+        if publication.published_source != "api":
+            continue
+        local = publication.published_at.replace(tzinfo=timezone.utc).astimezone(tz)
+        seconds_by_report.setdefault(publication.report_id, []).append(
+            local.hour * 3600 + local.minute * 60 + local.second
+        )
+    predicted: Dict[str, time] = {}
+    for report_id, seconds in seconds_by_report.items():
+        if len(seconds) < min_samples:
+            continue
+        median = int(_percentile(sorted(seconds), 0.5) or 0)
+        predicted[report_id] = time(median // 3600, median % 3600 // 60, median % 60)
+    return predicted
+
+
+def publication_to_dict(publication: ReportPublication) -> Dict[str, Any]:
+    return {
+        "report_id": publication.report_id,
+        "report_date": publication.report_date.isoformat(),
+        "published_at": publication.published_at.isoformat(),
+        "published_source": publication.published_source,
+        "detected_at": publication.detected_at.isoformat(),
+        "emailed_at": publication.emailed_at.isoformat() if publication.emailed_at else None,
+    }
+
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db.session import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+
+def rollup_run_history(retention_days: Optional[int] = None, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Fold runs older than the retention window into monthly counts and delete them.
+
+    Counts per (report, month, state) accumulate in report_run_rollups, so
+    report_runs and report_run_events only ever hold the recent window.
+    """
+    days = settings.run_retention_days if retention_days is None else retention_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    params = {"cutoff": cutoff, "now": datetime.utcnow()}
+    with SessionLocal() as db:
+        db.execute(
+            text(
+                "insert into report_run_rollups (report_id, month, state, run_count, updated_at) "
+                "select report_id, date_trunc('month', run_started_at)::date, state, sum(repeat_count), :now "
+                "from report_runs where run_started_at < :cutoff "
+                "group by report_id, date_trunc('month', run_started_at)::date, state "
+                "on conflict (report_id, month, state) do update "
+                "set run_count = report_run_rollups.run_count + excluded.run_count, updated_at = excluded.updated_at"
+            ),
+            params,
+        )
+        events = db.execute(
+            text(
+                "delete from report_run_events where report_run_id in "
+                "(select id from report_runs where run_started_at < :cutoff)"
+            ),
+            params,
+        ).rowcount
+        runs = db.execute(text("delete from report_runs where run_started_at < :cutoff"), params).rowcount
+        db.commit()
+    logger.info("run history rolled up: %s runs, %s events deleted", runs, events)
+    return {"runs_deleted": runs, "events_deleted": events}
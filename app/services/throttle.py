@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.config import settings
+from app.services.metrics import Counter, Gauge
+
+
+CIRCUIT_STATE = Gauge("usda_http_circuit_state", "Per-host circuit: 0 closed, 1 half-open, 2 open.", ["host"])
+CIRCUIT_REJECTED = Counter("usda_http_circuit_rejected_total", "Requests refused while a host's circuit was open.", ["host"])
+RATE_LIMIT_WAIT = Counter(
+    "usda_http_rate_limit_wait_seconds_total", "Time requests spent waiting for a rate-limit token.", ["host"]
+)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class TokenBucket:
+    """Admits ``rate`` requests per second with bursts of up to ``burst``.
+
+    Tokens are reserved under a lock and may go negative; the caller then sleeps
+    off the deficit, so async and threaded callers share one budget fairly.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and, after ``reset_seconds``, lets one probe through."""
+
+    def __init__(self, host: str, threshold: int, reset_seconds: float) -> None:
+        self.host = host
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """True while requests would be refused outright (not yet due a probe)."""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at < self.reset_seconds
+            return self.state == HALF_OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._set(HALF_OPEN)
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self._set(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self._set(OPEN)
+
+    def record_abandoned(self) -> None:
+        """A request gave up without an answer; if it was the probe, let the next request probe instead."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.opened_at = time.monotonic() - self.reset_seconds
+                self._set(OPEN)
+
+    def _set(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], host=self.host)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).hostname or ""
+
+
+def bucket_for(host: str) -> TokenBucket:
+    with _registry_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(settings.usda_rate_per_second, settings.usda_rate_burst)
+        return bucket
+
+
+def breaker_for(host: str) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(
+                host, settings.circuit_failure_threshold, settings.circuit_reset_seconds
+            )
+        return breaker
+
+
+def circuit_open(host: str) -> bool:
+    breaker = _breakers.get(host)
+    return breaker is not None and breaker.is_open()
+
+
+def _admit(host: str) -> float:
+    if not breaker_for(host).allow():
+        CIRCUIT_REJECTED.inc(host=host)
+        raise CircuitOpenError(f"Circuit open for {host}")
+    wait = bucket_for(host).reserve()
+    if wait:
+        RATE_LIMIT_WAIT.inc(wait, host=host)
+    return wait
+
+
+async def admit(url: str) -> str:
+    """Wait for a rate-limit token for ``url``'s host, or raise CircuitOpenError; returns the host."""
+    host = host_of(url)
+    wait = _admit(host)
+    if wait:
+        await asyncio.sleep(wait)
+    return host
+
+
+def admit_sync(url: str) -> str:
+    host = host_of(url)
+    wait = _admit(host)
+    if wait:
+        time.sleep(wait)
+    return host
+
+
+def record_abandoned(host: str) -> None:
+    """A request was cancelled (e.g. a losing hedge); it says nothing about the host."""
+    breaker_for(host).record_abandoned()
+
+
+def record_outcome(host: str, status_code: Optional[int]) -> None:
+    """Count a response (or a transport error, as None) against the host's circuit.
+
+    Timeouts, connection errors, 5xx and 429 are failures; anything else shows the host is answering.
+    """
+    breaker = breaker_for(host)
+    if status_code is None or status_code >= 500 or status_code == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
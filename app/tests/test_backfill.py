@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.bench.loadtest import synthetic_reports
+from app.config import settings
+from app.db.models import BackfillJob
+from app.services import backfill
+from app.services.backfill import claim_job, job_to_dict, resumable_job_ids
+
+
+def _job(**overrides):
+    fields = dict(
+        id="job-1",
+        report_id="PK600_MORNING_CASH",
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 12, 31),
+        chunk_days=30,
+        force=False,
+        status="running",
+        next_date=date(2025, 1, 1),
+        chunks_total=13,
+        chunks_done=0,
+        inserted=0,
+        skipped=0,
+        attempts=1,
+        active_seconds=0.0,
+    )
+    fields.update(overrides)
+    return BackfillJob(**fields)
+
+
+def test_progress_and_throughput_from_checkpoint():
+    result = job_to_dict(_job(next_date=date(2025, 3, 2), chunks_done=2, inserted=40, skipped=2, active_seconds=12.0))
+    assert result["next_date"] == "2025-03-02"
+    assert result["throughput"] == {
+        "active_seconds": 12.0,
+        "days_per_second": 5.0,
+        "versions_per_second": 3.5,
+        "eta_seconds": 61.0,
+    }
+
+
+def test_finished_job_has_no_checkpoint_or_eta():
+    result = job_to_dict(_job(status="completed", next_date=date(2026, 1, 1), chunks_done=13, active_seconds=30.0))
+    assert result["next_date"] is None
+    assert result["throughput"]["eta_seconds"] is None
+    assert job_to_dict(_job())["throughput"]["days_per_second"] is None
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    BackfillJob.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(backfill, "SessionLocal", factory)
+    return factory
+
+
+def _store(factory, **overrides):
+    with factory() as db:
+        db.add(_job(**overrides))
+        db.commit()
+
+
+def _stored(factory, job_id="job-1"):
+    with factory() as db:
+        return db.get(BackfillJob, job_id)
+
+
+def test_only_one_of_two_claims_succeeds(session_factory):
+    _store(session_factory, status="pending", attempts=0)
+    with session_factory() as first, session_factory() as second:
+        assert claim_job(first, "job-1") is True
+        assert claim_job(second, "job-1") is False
+    job = _stored(session_factory)
+    assert (job.status, job.attempts) == ("running", 1)
+
+
+def test_running_job_is_taken_over_only_once_stale(session_factory):
+    now = datetime(2026, 1, 15, 12, 0)
+    _store(session_factory, heartbeat_at=now - timedelta(seconds=settings.backfill_stale_seconds - 1))
+    with session_factory() as db:
+        assert resumable_job_ids(db, now) == []
+        assert claim_job(db, "job-1", now) is False
+        later = now + timedelta(seconds=2)
+        assert resumable_job_ids(db, later) == ["job-1"]
+        assert claim_job(db, "job-1", later) is True
+    job = _stored(session_factory)
+    assert (job.attempts, job.heartbeat_at) == (2, later)
+
+
+def test_failed_jobs_back_off_and_stop_at_max_attempts(session_factory):
+    failed_at = datetime(2026, 1, 15, 12, 0)
+    first_delay = timedelta(minutes=settings.backfill_resume_minutes)
+    _store(session_factory, id="once", status="failed", attempts=1, heartbeat_at=failed_at)
+    _store(session_factory, id="twice", status="failed", attempts=2, heartbeat_at=failed_at)
+    _store(
+        session_factory, id="spent", status="failed", attempts=settings.backfill_max_attempts, heartbeat_at=failed_at
+    )
+    with session_factory() as db:
+        assert resumable_job_ids(db, failed_at + first_delay - timedelta(seconds=1)) == []
+        assert resumable_job_ids(db, failed_at + first_delay) == ["once"]
+        assert sorted(resumable_job_ids(db, failed_at + 2 * first_delay)) == ["once", "twice"]
+        assert "spent" not in resumable_job_ids(db, failed_at + timedelta(days=30))
+
+
+def test_failed_chunk_resumes_from_checkpoint(session_factory, monkeypatch):
+    [report] = synthetic_reports(1, seed=1)
+    _store(
+        session_factory,
+        report_id=report.report_id,
+        status="pending",
+        attempts=0,
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 1, 9),
+        chunk_days=3,
+        chunks_total=3,
+    )
+    gathered = []
+    failures = {"left": 1}
+
+    def fake_gather(report, worker, start, end, force=False):
+        if start == date(2025, 1, 4) and failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("USDA 503")
+        gathered.append((start, end))
+        return {"inserted": 3, "skipped": 0}
+
+    monkeypatch.setattr(backfill, "gather_report", fake_gather)
+    monkeypatch.setattr(backfill, "get_reports", lambda: [report])
+    monkeypatch.setattr(backfill, "get_worker", lambda report_id: object())
+
+    failed = backfill.run_job("job-1")
+    assert (failed["status"], failed["next_date"], failed["chunks_done"]) == ("failed", "2025-01-04", 1)
+    assert _stored(session_factory).last_error == "USDA 503"
+
+    completed = backfill.run_job("job-1")
+    assert (completed["status"], completed["chunks_done"], completed["inserted"]) == ("completed", 3, 9)
+    assert gathered == [
+        (date(2025, 1, 1), date(2025, 1, 3)),
+        (date(2025, 1, 4), date(2025, 1, 6)),
+        (date(2025, 1, 7), date(2025, 1, 9)),
+    ]
+    assert _stored(session_factory).attempts == 2
+
+
+def test_resume_waits_while_usda_circuit_is_open(session_factory, monkeypatch):
+    _store(session_factory, status="pending", attempts=0)
+    monkeypatch.setattr(backfill, "circuit_open", lambda host: True)
+    assert backfill.resume_jobs() == 0
+    assert _stored(session_factory).status == "pending"
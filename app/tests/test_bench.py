@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.bench.fake_datamart import FakeDatamart, FakeDatamartOptions, create_app
+from app.bench.results import compare
+from app.bench.suite import BENCH_PREFIX, BenchContext, cleanup_database, database_available, run_benchmarks
+from app.db.models import Report, ReportCoverage
+from app.db.session import SessionLocal
+
+
+def test_fake_datamart_withholds_today_until_published():
+    now = {"value": datetime(2026, 1, 15, 9, 0, tzinfo=ZoneInfo("America/Chicago"))}
+    options = FakeDatamartOptions(rows_per_day=2, publish_at=time(10, 30), clock=lambda: now["value"])
+    client = TestClient(create_app(options))
+    url = "/services/v1.1/reports/2674/National Volume and Price Data"
+
+    rows = client.get(url, params={"q": "report_date=01/12/2026:01/15/2026"}).json()["results"]
+    assert sorted({row["report_date"] for row in rows}) == ["01/12/2026", "01/13/2026", "01/14/2026"]
+    assert len(rows) == 9
+
+    now["value"] = now["value"].replace(hour=11)
+    rows = client.get(url, params={"q": "report_date=01/15/2026"}).json()["results"]
+    assert rows[0]["published_date"] == "01/15/2026 10:30:00"
+
+
+def test_compare_flags_regressions_against_other_commits():
+    history = [
+        {"name": "pdf_parse", "params": {}, "median": 0.010, "commit": "aaa", "dirty": False},
+        {"name": "pdf_parse", "params": {}, "median": 0.001, "commit": "bbb", "dirty": True},
+    ]
+    summaries = [{"name": "pdf_parse", "params": {}, "median": 0.012, "p95": 0.013}]
+    [row] = compare(history, summaries, "ccc", threshold=0.1)
+    assert row["baseline_commit"] == "aaa"
+    assert row["regression"] is True
+
+
+@pytest.mark.skipif(not database_available(), reason="needs BENCH_DATABASE and the Postgres database")
+def test_cleanup_removes_coverage_written_by_worker_runs():
+    with FakeDatamart() as datamart:
+        ctx = BenchContext(datamart=datamart, iterations=2, years=1, today=date(2026, 1, 16), db_available=True)
+        [result] = run_benchmarks(ctx, only=["worker_run_publish"])
+    assert len(result.samples) == 2
+
+    cleanup_database()
+    with SessionLocal() as db:
+        for column in (Report.id, ReportCoverage.report_id):
+            assert db.scalars(select(column).where(column.startswith(BENCH_PREFIX, autoescape=True))).all() == []
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.services.concurrency import PRIORITY_BACKGROUND, PRIORITY_MANUAL, PRIORITY_WINDOW, PriorityLimiter
+
+
+def test_waiters_are_admitted_by_priority_then_arrival():
+    order = []
+
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire(PRIORITY_BACKGROUND)
+
+        async def run(name, priority, key=None):
+            async with limiter.slot(priority, key=key):
+                order.append(name)
+
+        tasks = [
+            asyncio.create_task(run("background", PRIORITY_BACKGROUND)),
+            asyncio.create_task(run("manual", PRIORITY_MANUAL)),
+            asyncio.create_task(run("promoted", PRIORITY_BACKGROUND, key="r1")),
+            asyncio.create_task(run("window", PRIORITY_WINDOW)),
+        ]
+        await asyncio.sleep(0)
+        limiter.promote("r1", PRIORITY_WINDOW)
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["promoted", "window", "manual", "background"]
+
+
+def test_busy_host_does_not_block_other_hosts():
+    async def scenario():
+        limiter = PriorityLimiter(3, per_host_limit=1)
+        usda = frozenset({"mpr.datamart.ams.usda.gov"})
+        await limiter.acquire(PRIORITY_WINDOW, usda)
+        blocked = asyncio.create_task(limiter.acquire(PRIORITY_WINDOW, usda))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(limiter.acquire(PRIORITY_BACKGROUND, frozenset({"www.ams.usda.gov"})), timeout=1)
+        assert not blocked.done()
+        limiter.release(usda)
+        await asyncio.wait_for(blocked, timeout=1)
+        assert limiter.active == 2
+
+    asyncio.run(scenario())
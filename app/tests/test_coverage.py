@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.services.coverage import missing_ranges
+from app.services.market_calendar import MarketCalendar
+
+
+def test_missing_ranges_span_weekends_and_holidays_but_split_at_covered_days():
+    calendar = MarketCalendar()
+    covered = {date(2026, 1, 6), date(2026, 1, 7), date(2026, 1, 8)}
+    # Jan 19 is MLK Day; Jan 16 -> Jan 20 is still one gap.
+    assert missing_ranges(covered, date(2026, 1, 1), date(2026, 1, 23), calendar) == [
+        (date(2026, 1, 2), date(2026, 1, 5)),
+        (date(2026, 1, 9), date(2026, 1, 23)),
+    ]
+
+
+def test_fully_covered_range_needs_no_fetch():
+    calendar = MarketCalendar()
+    covered = {date(2026, 7, 1), date(2026, 7, 2), date(2026, 7, 6)}
+    assert missing_ranges(covered, date(2026, 7, 1), date(2026, 7, 6), calendar) == []
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.http import EndpointLatency, SharedClient, endpoint_of
+from app.services.throttle import breaker_for
+
+
+def test_identical_requests_share_one_network_call():
+    calls = []
+
+    async def handler(request):
+        calls.append((request.method, str(request.url), request.headers.get("range")))
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"results": []})
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        url = "https://mpr.datamart.ams.usda.gov/services/v1.1/reports/2498/Cutout"
+        responses = await asyncio.gather(*[client.get(url) for _ in range(4)])
+        assert all(resp is responses[0] for resp in responses)
+        assert await client.get(url) is responses[0]
+        await client.get(url, headers={"Range": "bytes=0-9"})
+        await client.head(url)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert [method for method, _, _ in calls] == ["GET", "GET", "HEAD"]
+    assert calls[1][2] == "bytes=0-9"
+
+
+def test_failures_reach_every_caller_and_are_not_cached():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(503)
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        url = "https://mpr.datamart.ams.usda.gov/services/v1.1/reports/2511/Barrows"
+        first, second = await asyncio.gather(client.get(url), client.get(url))
+        assert first.status_code == second.status_code == 503
+        await client.get(url)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"call": len(calls)})
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        url = "https://mpr.datamart.ams.usda.gov/services/v1.1/reports/2498/Cutout?q=report_date=10/16/2026"
+        leader = asyncio.ensure_future(client.get(url))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(client.get(url))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        response = await follower
+        await client.aclose()
+        return leader, response
+
+    leader, response = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert response.json() == {"call": 2}
+
+
+def test_read_timeout_follows_observed_latency():
+    latency = EndpointLatency("https://mpr.datamart.ams.usda.gov/services/v1.1/reports/2498/Cutout")
+    latency.samples.extend([1.0] * (settings.http_latency_min_samples - 1))
+    assert latency.read_timeout() == settings.http_read_timeout_seconds
+    latency.observe(1.0)
+    assert latency.read_timeout() == 1.0 * settings.http_timeout_multiplier
+    latency.samples.extend([0.01] * 200)
+    assert latency.read_timeout() == settings.http_read_timeout_min_seconds
+
+
+
+def test_range_queries_keep_their_own_latency_and_adaptive_expiry_is_not_a_failure():
+    cutout = "https://timeout.example/services/v1.1/reports/2498/Cutout"
+    assert endpoint_of(f"{cutout}?q=report_date=10/16/2026") == cutout
+    assert endpoint_of(f"{cutout}?q=report_date=10/12/2026:10/16/2026") == f"{cutout}[range]"
+    assert endpoint_of(f"{cutout}?q=report_date%3D10/12/2026%3A10/16/2026") == f"{cutout}[range]"
+
+    async def handler(request):
+        raise httpx.ReadTimeout("slow", request=request)
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        url = f"{cutout}?q=report_date=10/16/2026"
+        client.latency[endpoint_of(url)] = latency = EndpointLatency(endpoint_of(url))
+        latency.samples.extend([0.02] * settings.http_latency_min_samples)
+        for _ in range(settings.circuit_failure_threshold):
+            try:
+                await client.get(url)
+            except httpx.ReadTimeout:
+                pass
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert breaker_for("timeout.example").failures == 0
+
+def test_slow_request_is_hedged_and_first_answer_wins(monkeypatch):
+    monkeypatch.setattr(settings, "http_hedge_requests", True)
+    monkeypatch.setattr(settings, "http_cache_ttl_seconds", 0)
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url)
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+        return httpx.Response(200, json={"call": len(calls)})
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        url = "https://mpr.datamart.ams.usda.gov/services/v1.1/reports/2498/Cutout?q=report_date=10/19/2026"
+        client.latency[endpoint_of(url)] = latency = EndpointLatency(endpoint_of(url))
+        latency.samples.extend([0.02] * settings.http_latency_min_samples)
+        started = time.perf_counter()
+        response = await client.get(url)
+        elapsed = time.perf_counter() - started
+        await client.aclose()
+        return response, elapsed
+
+    response, elapsed = asyncio.run(scenario())
+    assert response.json() == {"call": 2}
+    assert elapsed < 0.5
+    assert len(calls) == 2
+
+
+def test_warm_opens_separate_connections_to_the_origin():
+    calls = []
+
+    async def handler(request):
+        calls.append((request.method, str(request.url)))
+        await asyncio.sleep(0.01)
+        return httpx.Response(404)
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ready = await client.warm("https://mpr.datamart.ams.usda.gov/services/v1.1/reports/2498", connections=2)
+        await client.aclose()
+        return ready
+
+    assert asyncio.run(scenario()) == 2
+    assert calls == [("HEAD", "https://mpr.datamart.ams.usda.gov/")] * 2
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.services.json_stream import ResultsStreamDecoder, iter_result_rows
+
+
+def _chunks(text: str, size: int):
+    return [text[idx : idx + size] for idx in range(0, len(text), size)]
+
+
+def _load_fixture(name: str):
+    with open(f"app/tests/fixtures/{name}.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 100000])
+def test_results_object_decoded_in_chunks(size):
+    rows = _load_fixture("hg201_two_day")
+    body = json.dumps({"reportSection": "Barrows/Gilts", "stats": {"returnedRows": 1234}, "results": rows, "after": 5})
+    assert list(iter_result_rows(_chunks(body, size))) == rows
+
+
+@pytest.mark.parametrize("size", [1, 5, 100000])
+def test_top_level_array_decoded_in_chunks(size):
+    rows = _load_fixture("pk600_morning_cash")
+    body = json.dumps(rows, indent=2)
+    assert list(iter_result_rows(_chunks(body, size))) == rows
+
+
+def test_missing_results_yields_nothing():
+    assert list(iter_result_rows(_chunks('{"message": "No Results Found", "results": null}', 4))) == []
+
+
+def test_truncated_response_raises():
+    decoder = ResultsStreamDecoder()
+    decoder.feed('{"results": [{"a": 1}, {"b": ')
+    with pytest.raises(ValueError):
+        decoder.close()
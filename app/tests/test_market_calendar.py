@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app.services.market_calendar import MarketCalendar
+
+
+def test_federal_holidays_use_observed_dates():
+    calendar = MarketCalendar()
+    assert calendar.holiday_name(date(2026, 7, 3)) == "independence_day"
+    assert calendar.holiday_name(date(2026, 11, 26)) == "thanksgiving"
+    assert calendar.holiday_name(date(2027, 12, 31)) == "new_years_day"
+    assert calendar.holiday_name(date(2026, 1, 17)) == "weekend"
+    assert calendar.is_publication_day(date(2026, 7, 2))
+
+
+def test_previous_publication_day_skips_weekends_and_holidays():
+    calendar = MarketCalendar()
+    assert calendar.previous_publication_day(date(2026, 1, 20)) == date(2026, 1, 16)
+    assert calendar.previous_publication_day(date(2026, 11, 27)) == date(2026, 11, 25)
+
+
+def test_config_overrides():
+    calendar = MarketCalendar(
+        skip_rules=["columbus_day"], closed=[date(2026, 12, 24)], open_dates=[date(2026, 11, 11)]
+    )
+    assert calendar.is_publication_day(date(2026, 10, 12))
+    assert calendar.is_publication_day(date(2026, 11, 11))
+    assert calendar.holiday_name(date(2026, 12, 24)) == "closed"
+    with pytest.raises(ValueError):
+        MarketCalendar(skip_rules=["boxing_day"])
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import date
+
+from app.services import pdf_tables
+from app.services.pdf_tables import extract_table_rows
+from app.workers import pk600_morning_cutout_pdf as pdf_worker
+from app.workers.pk600_morning_cutout_pdf import PRIMAL_TABLE, PK600MorningCutoutPdfWorker
+
+
+_COLUMNS_X = [40, 110, 160, 210, 260, 310, 360, 410, 460]
+
+
+def _make_pdf(pages):
+    """Build a minimal PDF; each page is a list of (x, y, text) placements in Helvetica 9pt."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for placements in pages:
+        ops = ["BT /F1 9 Tf"] + [f"1 0 0 1 {x} {y} Tm ({text}) Tj" for x, y, text in placements] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode("latin-1")
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode("latin-1")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for idx, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{idx + 1} 0 obj\n".encode("latin-1") + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+def _row(y, values):
+    return [(x, y, value) for x, value in zip(_COLUMNS_X, values) if value]
+
+
+def _primal_page(day, belly):
+    header = _row(700, ["Date", "Loads", "Carcass", "Loin", "Butt", "Pic", "Rib", "Ham", "Belly"])
+    values = _row(685, [day, "145.2", "95.12", "88.10", "102.33", "70.50", "150.22", "85.40", belly])
+    change = _row(670, ["Change:", "", "0.52", "-1.10", "0.33", "-0.25", "1.02", "0.40", "-2.10"])
+    note = [(40, 640, "Loads are reported in 40,000 lb units")]
+    return [(20, 760, f"National Daily Pork Report {day}")] + header + values + change + note
+
+
+def test_rows_follow_header_columns():
+    rows = extract_table_rows(_make_pdf([_primal_page("01/12/2026", "120.10")]), PRIMAL_TABLE)
+
+    assert [row["date"] for row in rows] == ["01/12/2026", "Change:"]
+    assert rows[0]["belly"] == "120.10"
+    # The change row has no loads value; the remaining values must not shift left.
+    assert rows[1]["loads"] == ""
+    assert rows[1]["carcass"] == "0.52"
+    assert rows[1]["belly"] == "-2.10"
+
+
+def test_primal_fields_from_rows():
+    rows = extract_table_rows(_make_pdf([_primal_page("01/12/2026", "120.10")]), PRIMAL_TABLE)
+    fields = PK600MorningCutoutPdfWorker._primal_fields(rows, date(2026, 1, 12))
+
+    assert fields["loads"] == "145.2"
+    assert fields["change_belly"] == "-2.10"
+    assert "change_loads" not in fields
+
+
+def test_tables_on_every_page_and_unchanged_pages_are_cached(monkeypatch):
+    first = _primal_page("01/12/2026", "120.10")
+    calls = []
+    original = pdf_tables._extract_page_rows
+
+    def counting(page, template):
+        calls.append(page.page_number)
+        return original(page, template)
+
+    monkeypatch.setattr(pdf_tables, "_extract_page_rows", counting)
+    pdf_tables._page_cache.clear()
+
+    rows = extract_table_rows(_make_pdf([first, _primal_page("01/13/2026", "121.00")]), PRIMAL_TABLE)
+    assert [row["date"] for row in rows] == ["01/12/2026", "Change:", "01/13/2026", "Change:"]
+    assert calls == [1, 2]
+
+    rows = extract_table_rows(_make_pdf([first, _primal_page("01/13/2026", "122.50")]), PRIMAL_TABLE)
+    assert rows[2]["belly"] == "122.50"
+    assert calls == [1, 2, 2]
+
+
+def test_page_text_is_tried_before_the_table_engine(monkeypatch):
+    calls = []
+    original = pdf_worker.extract_table_rows
+
+    def counting(content, template):
+        calls.append(template)
+        return original(content, template)
+
+    monkeypatch.setattr(pdf_worker, "extract_table_rows", counting)
+    fields = pdf_worker.extract_pdf_fields(_make_pdf([_primal_page("01/12/2026", "120.10")]), date(2026, 1, 1))
+    assert fields["report_date"] == date(2026, 1, 12)
+    assert (fields["belly"], fields["change_belly"]) == ("120.10", "-2.10")
+    assert calls == []
+
+    # The primal table is only on page 2, which the first-page text does not cover.
+    cover = [(20, 760, "National Daily Pork Report 01/13/2026")]
+    fields = pdf_worker.extract_pdf_fields(_make_pdf([cover, _primal_page("01/13/2026", "121.00")]), date(2026, 1, 1))
+    assert fields["belly"] == "121.00"
+    assert calls == [PRIMAL_TABLE]
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+from app.db.models import ReportPublication
+from app.services.publications import latency_summary, predicted_publication_times, published_at_from_payloads
+
+
+def _publication(published_at, detected_at, emailed_at=None, source="api"):
+    return ReportPublication(
+        report_id="PK600_MORNING_CASH",
+        report_date=date(2026, 1, 15),
+        published_at=published_at,
+        published_source=source,
+        detected_at=detected_at,
+        emailed_at=emailed_at,
+    )
+
+
+def test_published_at_is_read_in_market_time():
+    payloads = [[], [{"report_date": "01/15/2026", "published_date": "01/15/2026 10:31:07"}]]
+    published = published_at_from_payloads(payloads, date(2026, 1, 15), ZoneInfo("America/Chicago"))
+    assert published == datetime(2026, 1, 15, 16, 31, 7)
+
+
+
+def test_published_at_comes_from_the_version_date_rows():
+    payloads = [
+        [
+            {"report_date": "01/14/2026", "published_date": "01/14/2026 10:30:12"},
+            {"report_date": "01/15/2026", "published_date": "01/15/2026 10:31:07"},
+        ]
+    ]
+    tz = ZoneInfo("America/Chicago")
+    assert published_at_from_payloads(payloads, date(2026, 1, 15), tz) == datetime(2026, 1, 15, 16, 31, 7)
+    assert published_at_from_payloads(payloads, date(2026, 1, 16), tz) is None
+
+def test_published_at_missing():
+    payloads = [[{"report_date": "01/15/2026"}]]
+    assert published_at_from_payloads(payloads, date(2026, 1, 15), ZoneInfo("America/Chicago")) is None
+
+
+def test_latency_summary_percentiles():
+    base = datetime(2026, 1, 15, 16, 0, 0)
+    publications = [
+        _publication(base, base.replace(second=seconds), base.replace(minute=1, second=seconds))
+        for seconds in (10, 20, 30, 40, 50)
+    ]
+    publications.append(_publication(base, base.replace(second=55), base.replace(second=56), source="first_poll"))
+
+    summary = latency_summary(publications)
+    assert summary["count"] == 6
+    assert summary["api_timestamped"] == 5
+    assert summary["detection_seconds"] == {"p50": 30.0, "p95": 48.0}
+    assert summary["email_seconds"] == {"p50": 90.0, "p95": 108.0}
+
+
+def test_predicted_publication_time_is_the_median_in_market_time():
+    publications = [
+        _publication(datetime(2026, 1, day, 16, minute), datetime(2026, 1, day, 16, 40))
+        for day, minute in ((12, 30), (13, 32), (14, 45), (15, 31))
+    ]
+    publications.append(_publication(datetime(2026, 1, 16, 19, 0), datetime(2026, 1, 16, 19, 0), source="first_poll"))
+
+    assert predicted_publication_times(publications, ZoneInfo("America/Chicago")) == {
+        "PK600_MORNING_CASH": time(10, 31, 30)
+    }
+    assert predicted_publication_times(publications[:2], ZoneInfo("America/Chicago")) == {}
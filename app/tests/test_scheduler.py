@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from app.bench.loadtest import synthetic_reports
+from app.config import settings
+from app.scheduler import SchedulerService
+
+
+class _StubWorker:
+    def __init__(self) -> None:
+        self.runs = 0
+
+    async def run(self) -> bool:
+        self.runs += 1
+        return True
+
+
+def test_tick_uses_injected_clock_and_records_lag():
+    reports = synthetic_reports(3, seed=1)
+    workers = {report.report_id: _StubWorker() for report in reports}
+    now = {"value": datetime(2026, 1, 15, 10, 0, tzinfo=ZoneInfo("America/Chicago"))}
+    started = []
+
+    class Recording(SchedulerService):
+        def _record_start(self, report, lag_seconds, wait_seconds):
+            started.append((report.report_id, lag_seconds))
+
+    service = Recording(clock=lambda: now["value"], reports=lambda: reports, workers=workers.get)
+
+    async def scenario():
+        await service.tick()
+        await asyncio.sleep(0)
+        now["value"] += timedelta(hours=2)
+        await service.tick()
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert all(worker.runs == 2 for worker in workers.values())
+    assert [lag for _, lag in started[:3]] == [0.0, 0.0, 0.0]
+    assert all(lag > 0 for _, lag in started[3:])
+
+
+class _BlockingWorker:
+    def __init__(self) -> None:
+        self.runs = 0
+        self.release = asyncio.Event()
+
+    async def run(self) -> bool:
+        self.runs += 1
+        await self.release.wait()
+        return True
+
+
+def test_inflight_runs_are_joined_not_repeated():
+    [report] = synthetic_reports(1, seed=2)
+    worker = _BlockingWorker()
+    now = {"value": datetime(2026, 1, 15, 10, 0, tzinfo=ZoneInfo("America/Chicago"))}
+    service = SchedulerService(clock=lambda: now["value"], reports=lambda: [report], workers=lambda _: worker)
+
+    async def scenario():
+        await service.tick()
+        first = service.inflight[report.report_id]
+        now["value"] += timedelta(hours=2)
+        await service.tick()
+        manual = service.trigger(report.report_id)
+        assert manual is first
+        await asyncio.sleep(0)
+        worker.release.set()
+        assert await manual is True
+        await asyncio.sleep(0)
+        assert report.report_id not in service.inflight
+
+    asyncio.run(scenario())
+    assert worker.runs == 1
+
+
+def test_warmups_are_planned_before_windows_and_predicted_publications():
+    [report] = synthetic_reports(1, seed=3)
+    tz = ZoneInfo("America/Chicago")
+    service = SchedulerService(reports=lambda: [report])
+    window_start = report.windows[0].start
+    now = datetime.combine(datetime(2026, 1, 15).date(), window_start, tzinfo=tz) - timedelta(hours=1)
+    predicted = (datetime.combine(now.date(), window_start) + timedelta(minutes=20)).time()
+
+    plan = service.warmup_plan(now, {report.report_id: predicted})
+
+    lead = timedelta(seconds=settings.http_warmup_lead_seconds)
+    assert sorted(plan) == [
+        datetime.combine(now.date(), window_start, tzinfo=tz) - lead,
+        datetime.combine(now.date(), predicted, tzinfo=tz) - lead,
+    ]
+    assert all(origins == {"https://mpr.datamart.ams.usda.gov/"} for origins in plan.values())
+    assert service.warmup_plan(now + timedelta(hours=3), {}) == {}
+
+
+def test_replanning_warmups_does_not_duplicate_jobs():
+    [report] = synthetic_reports(1, seed=5)
+    tz = ZoneInfo("America/Chicago")
+    now = datetime.combine(datetime(2026, 1, 15).date(), report.windows[0].start, tzinfo=tz) - timedelta(hours=1)
+
+    class NoPredictions(SchedulerService):
+        def _predicted_publications(self):
+            return {}
+
+    service = NoPredictions(clock=lambda: now, reports=lambda: [report])
+
+    async def scenario():
+        service.scheduler.start(paused=True)
+        await service.plan_warmups()
+        await service.plan_warmups()
+        jobs = [job.id for job in service.scheduler.get_jobs() if job.id.startswith("warmup:")]
+        service.scheduler.shutdown(wait=False)
+        return jobs
+
+    assert len(asyncio.run(scenario())) == 1
+
+
+def test_no_polls_or_warmups_on_non_publication_days():
+    reports = synthetic_reports(2, seed=4)
+    workers = {report.report_id: _StubWorker() for report in reports}
+    holiday = datetime(2026, 1, 19, 10, 0, tzinfo=ZoneInfo("America/Chicago"))
+    service = SchedulerService(clock=lambda: holiday, reports=lambda: reports, workers=workers.get)
+
+    async def scenario():
+        await service.tick()
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert all(worker.runs == 0 for worker in workers.values())
+    assert service.warmup_plan(holiday.replace(hour=0), {}) == {}
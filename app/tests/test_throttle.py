@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import time
+
+from app.services.throttle import CircuitBreaker, TokenBucket
+
+
+def test_token_bucket_spreads_requests_beyond_the_burst():
+    bucket = TokenBucket(rate=10.0, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.05 < waits[2] <= 0.1
+    assert 0.15 < waits[3] <= 0.2
+
+
+def test_circuit_opens_then_lets_one_probe_through():
+    breaker = CircuitBreaker("mpr.datamart.ams.usda.gov", threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open() and not breaker.allow()
+
+    time.sleep(0.06)
+    assert not breaker.is_open()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
-from datetime import date
+from dataclasses import replace
+from datetime import date, datetime, timedelta
 
-from app.registry import get_reports
+import httpx
+
+from app.registry import EndpointConfig, get_reports
 from app.services.alerts import AlertService
 from app.services.email import EmailPayload
-from app.workers.base import BaseWorker
+from app.config import settings
+from app.services.http import SharedClient
+from app.workers import pk600_morning_cutout_pdf as pdf_worker
+from app.workers.base import _RANGE_UNSUPPORTED, BaseWorker, FetchError
 
 
 def _load_fixture(name: str):
@@ -32,3 +40,138 @@ def test_pk600_morning_cash_parse():
     assert parsed["wtd_avg"] == 76.5
     assert parsed["price_low"] == 74.0
     assert parsed["price_high"] == 79.0
+
+
+def test_payload_hash_matches_canonical_json():
+    payloads = [_load_fixture("pk600_morning_cash"), [], _load_fixture("hg201_two_day")]
+    normalized = json.dumps(payloads, sort_keys=True, default=str)
+    expected = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    assert BaseWorker.compute_hash_from_payloads(payloads) == expected
+
+
+def test_payload_hash_skips_excluded_fields():
+    class PdfLikeWorker(BaseWorker):
+        hash_exclude_fields = frozenset({"pdf_base64"})
+
+    row = {"report_date": "01/15/2026", "pdf_sha256": "abc"}
+    with_pdf = [[dict(row, pdf_base64="QUJD")]]
+    assert PdfLikeWorker.compute_hash_from_payloads(with_pdf) == BaseWorker.compute_hash_from_payloads([[row]])
+
+
+def test_date_window_uses_one_range_query_and_walks_only_endpoints_that_reject_it():
+    ranged, walked = EndpointConfig(92498, "Ranged"), EndpointConfig(92499, "Walked")
+    config = replace(
+        next(r for r in get_reports() if r.report_id == "PK600_MORNING_CASH"),
+        endpoints=[ranged, walked],
+        date_search_window_days=7,
+    )
+    email = DummyEmailService()
+    worker = BaseWorker(config, email, AlertService(email))
+    today = datetime.now(tz=worker.tz).date()
+    published = (today - timedelta(days=2)).strftime("%m/%d/%Y")
+    requested = []
+
+    async def handler(request):
+        report_number = int(request.url.path.split("/")[-2])
+        query = request.url.params["q"].split("=", 1)[1]
+        requested.append((report_number, query))
+        if ":" in query:
+            if report_number == walked.report_number:
+                return httpx.Response(400, json={"message": "ranges not supported"})
+            rows = [{"report_date": published, "head_count": 1}, {"report_date": "01/01/2000", "head_count": 2}]
+            return httpx.Response(200, json={"results": rows})
+        rows = [{"report_date": published, "head_count": 3}] if query == published else []
+        return httpx.Response(200, json={"results": rows})
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        result = await worker._fetch_for_date_window(client)
+        await client.aclose()
+        return result
+
+    report_date, fetch_result, is_holiday = asyncio.run(scenario())
+    assert report_date == today - timedelta(days=2) and not is_holiday
+    assert fetch_result.payloads == [
+        [{"report_date": published, "head_count": 1}],
+        [{"report_date": published, "head_count": 3}],
+    ]
+    assert [number for number, _ in requested].count(ranged.report_number) == 1
+    assert [query for number, query in requested if number == walked.report_number][1:] == [
+        (today - timedelta(days=offset)).strftime("%m/%d/%Y") for offset in range(3)
+    ]
+
+
+def test_transient_range_errors_do_not_disable_ranges():
+    endpoint = EndpointConfig(92497, "Flaky")
+    config = replace(next(r for r in get_reports() if r.report_id == "PK600_MORNING_CASH"), endpoints=[endpoint])
+    email = DummyEmailService()
+    worker = BaseWorker(config, email, AlertService(email))
+
+    async def scenario():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+        try:
+            await worker._fetch_range(client, endpoint, date(2026, 1, 12), date(2026, 1, 16))
+        except FetchError:
+            return True
+        finally:
+            await client.aclose()
+        return False
+
+    assert asyncio.run(scenario())
+    assert endpoint not in _RANGE_UNSUPPORTED
+
+
+def test_pdf_probe_sees_tail_edits_and_retries_failed_extractions(monkeypatch):
+    monkeypatch.setattr(settings, "http_cache_ttl_seconds", 0)
+    monkeypatch.setattr(settings, "cpu_executor", "inline")
+    content = {"value": b"%PDF" + b"a" * 10000}
+    extracted = []
+
+    def extract(data, fallback_date):
+        extracted.append(data)
+        if data.endswith(b"broken"):
+            raise ValueError("unreadable PDF")
+        return {"report_date": date(2026, 1, 15), "belly": data[-1:].decode()}
+
+    def handler(request):
+        data = content["value"]
+        if request.method == "HEAD":
+            return httpx.Response(200)
+        byte_range = request.headers.get("range")
+        if byte_range is None:
+            return httpx.Response(200, content=data)
+        start, end = byte_range.removeprefix("bytes=").split("-")
+        part = data[int(start) : int(end) + 1] if start else data[-int(end) :]
+        return httpx.Response(206, content=part, headers={"Content-Range": f"bytes */{len(data)}"})
+
+    monkeypatch.setattr(pdf_worker, "extract_pdf_fields", extract)
+    config = next(r for r in get_reports() if r.report_id == "PK600_MORNING_CUTOUT_PDF")
+    email = DummyEmailService()
+    worker = pdf_worker.PK600MorningCutoutPdfWorker(config, email, AlertService(email))
+
+    async def poll():
+        client = SharedClient()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await worker._fetch_for_date_window(client)
+        finally:
+            await client.aclose()
+
+    asyncio.run(poll())
+    asyncio.run(poll())
+    assert len(extracted) == 1
+
+    # Same size, changed only past the leading bytes.
+    content["value"] = content["value"][:-1] + b"b"
+    _, fetch_result, _ = asyncio.run(poll())
+    assert fetch_result.payloads[0][0]["belly"] == "b"
+
+    content["value"] = b"%PDF" + b"a" * 9994 + b"broken"
+    for _ in range(2):
+        try:
+            asyncio.run(poll())
+        except ValueError:
+            pass
+    assert len(extracted) == 4
@@ -4,10 +4,15 @@ from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from app.registry import get_reports
-from app.workers.base import BaseWorker, FetchResult, ParseError
+from app.services.executors import uses_processes
+from app.services.market_calendar import get_calendar
+from app.services.metrics import stage
+from app.workers.base import BaseWorker, FetchResult, ParseError, rows_from_json
 
 
 class HG201CmeIndexWorker(BaseWorker):
+    parse_executor = "cpu"
+
     CATEGORY_MAP = {
         "negotiated": "Prod. Sold Negotiated",
         "formula": "Prod. Sold Swine or Pork Market Formula",
@@ -16,31 +21,37 @@ class HG201CmeIndexWorker(BaseWorker):
 
     async def _fetch_for_date_window(self, client) -> Tuple[Optional[date], Optional[FetchResult], bool]:
         today = self.forced_report_date or datetime.now(tz=self.tz).date()
-        start = today - timedelta(days=self.config.date_search_window_days - 1)
-        report_range = f"{start.strftime('%m/%d/%Y')}:{today.strftime('%m/%d/%Y')}"
-        endpoint = self.config.endpoints[0]
-        url = endpoint.build_url(report_range)
-        resp = await client.get(url)
-        resp.raise_for_status()
-        data = resp.json()
-        if isinstance(data, dict) and isinstance(data.get("results"), list):
-            rows = data["results"]
-        elif isinstance(data, list):
-            rows = data
-        else:
-            rows = []
-        if not rows:
-            return today, None, self._should_mark_holiday(today)
-
+        calendar = get_calendar()
+        if not calendar.is_publication_day(today):
+            return today, None, True
+        # The prior reported day comes from the calendar, so the range covers only the two days the index needs.
+        prior = calendar.previous_publication_day(today)
+        rows, url, body = await self._fetch_rows(client, prior, today)
         grouped = self._group_by_date(rows)
-        if today not in grouped:
-            return today, None, self._should_mark_holiday(today)
+        if today in grouped and prior not in grouped:
+            # USDA published on a day the calendar does not expect; search the whole window for the prior day.
+            start = today - timedelta(days=self.config.date_search_window_days - 1)
+            rows, url, body = await self._fetch_rows(client, start, today)
+            grouped = self._group_by_date(rows)
+        if not rows or today not in grouped:
+            return today, None, False
         latest_any = self._latest_any_date(rows)
         if not latest_any:
-            return today, None, self._should_mark_holiday(today)
+            return today, None, False
 
-        payloads = [rows]
-        return latest_any, FetchResult(payloads=payloads, urls=[url]), False
+        # The rows decoded here pick the range and are stored as the raw payload. A process executor gets the
+        # response bytes as they arrived and works out the latest date again in the child (see _parse).
+        bodies = [body] if uses_processes(self.parse_executor) else None
+        return latest_any, FetchResult(payloads=[rows], urls=[url], bodies=bodies), False
+
+    async def _fetch_rows(self, client, start: date, end: date) -> Tuple[List[Dict[str, Any]], str, bytes]:
+        report_range = f"{start.strftime('%m/%d/%Y')}:{end.strftime('%m/%d/%Y')}"
+        url = self.config.endpoints[0].build_url(report_range)
+        resp = await client.get(url)
+        resp.raise_for_status()
+        with stage("decode"):
+            rows = rows_from_json(resp.json())
+        return rows, url, resp.content
 
     def _parse(self, payloads: List[List[Dict[str, Any]]], report_date: date) -> Dict[str, Any]:
         if not payloads or not payloads[0]:
@@ -1,48 +1,115 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 import io
 import re
 from datetime import date, datetime
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import pdfplumber
+import pypdfium2 as pdfium
 
-from app.registry import get_reports
+from app.registry import ReportConfig, get_reports
+from app.services.alerts import AlertService
+from app.services.email import EmailService
+from app.services.executors import run_in_executor
+from app.services.metrics import stage
+from app.services.pdf_tables import TableTemplate, extract_table_rows
 from app.workers.base import BaseWorker, FetchResult
 
 
+_PROBE_BYTES = 4096
+
+PRIMAL_TABLE = TableTemplate(
+    name="pk600_morning_primals",
+    headers=("Date", "Loads", "Carcass", "Loin", "Butt", "Pic", "Rib", "Ham", "Belly"),
+    fields=("date", "loads", "carcass", "loin", "butt", "pic", "rib", "ham", "belly"),
+    row_label=re.compile(r"^(\d{1,2}/\d{1,2}/\d{4}|Change:)$"),
+)
+
+
 class PK600MorningCutoutPdfWorker(BaseWorker):
+    # The PDF bytes are represented in the hash by pdf_sha256; hashing the base64 copy as well is wasted work.
+    hash_exclude_fields = frozenset({"pdf_base64"})
+
+    def __init__(self, config: ReportConfig, email_service: EmailService, alert_service: AlertService) -> None:
+        super().__init__(config, email_service, alert_service)
+        self._last_pdf: Optional[Tuple[str, date, FetchResult]] = None
+        self._last_probe: Optional[Tuple[object, ...]] = None
+
     async def _fetch_for_date_window(self, client) -> Tuple[Optional[date], Optional[FetchResult], bool]:
         endpoint = self.config.endpoints[0]
         url = endpoint.build_url("")
-        resp = await client.get(url)
-        resp.raise_for_status()
-        content = resp.content
+        probe, content = await self._probe(client, url)
+        if content is None:
+            if probe is not None and probe == self._last_probe and self._last_pdf:
+                _, report_date, fetch_result = self._last_pdf
+                return report_date, fetch_result, False
+            resp = await client.get(url)
+            resp.raise_for_status()
+            content = resp.content
+        pdf_sha256 = hashlib.sha256(content).hexdigest()
+        if self._last_pdf and self._last_pdf[0] == pdf_sha256:
+            # Same bytes as the previous poll; reuse that parse instead of opening the PDF again.
+            self._last_probe = probe
+            _, report_date, fetch_result = self._last_pdf
+            return report_date, fetch_result, False
 
-        text_excerpt = ""
-        page_count = 0
-        try:
-            with pdfplumber.open(io.BytesIO(content)) as pdf:
-                page_count = len(pdf.pages)
-                if pdf.pages:
-                    text_excerpt = (pdf.pages[0].extract_text() or "")[:1000]
-        except Exception:
-            text_excerpt = ""
-
-        report_date = self._extract_date(text_excerpt) or datetime.now(tz=self.tz).date()
-        table_fields = self._extract_primal_values(text_excerpt, report_date)
+        with stage("pdf_extract"):
+            extracted = await run_in_executor("cpu", extract_pdf_fields, content, datetime.now(tz=self.tz).date())
+        report_date: date = extracted.pop("report_date")
         payload_row: Dict[str, object] = {
             "report_date": report_date.strftime("%m/%d/%Y"),
-            "text_excerpt": text_excerpt,
-            "page_count": page_count,
+            "pdf_sha256": pdf_sha256,
             "pdf_base64": base64.b64encode(content).decode("ascii"),
         }
-        payload_row.update(table_fields)
-        payloads = [[payload_row]]
-        return report_date, FetchResult(payloads=payloads, urls=[url]), False
+        payload_row.update(extracted)
+        fetch_result = FetchResult(payloads=[[payload_row]], urls=[url])
+        # Remembered only once the parse succeeded, so a failed extraction is retried on the next poll.
+        self._last_pdf = (pdf_sha256, report_date, fetch_result)
+        self._last_probe = probe
+        return report_date, fetch_result, False
+
+    async def _probe(self, client, url: str) -> Tuple[Optional[Tuple[object, ...]], Optional[bytes]]:
+        """Cheaply fingerprint the remote PDF before committing to a full download.
+
+        Returns ``(signature, content)``. ``content`` is set only when the server
+        ignored the Range header and sent the whole file anyway. A ``None``
+        signature means the probe was inconclusive and the PDF must be fetched.
+        """
+        try:
+            head = await client.head(url)
+            if head.status_code < 400 and (head.headers.get("etag") or head.headers.get("last-modified")):
+                return (
+                    "head",
+                    head.headers.get("etag"),
+                    head.headers.get("last-modified"),
+                    head.headers.get("content-length"),
+                ), None
+            # No validators on HEAD: compare the total size and the leading and trailing bytes instead. The
+            # trailing bytes (xref table and trailer) change when an edit further in keeps the size.
+            first = await client.get(url, headers={"Range": f"bytes=0-{_PROBE_BYTES - 1}"})
+            if first.status_code != 206:
+                return None, first.content if first.status_code == 200 else None
+            last = await client.get(url, headers={"Range": f"bytes=-{_PROBE_BYTES}"})
+        except Exception:
+            return None, None
+        if last.status_code == 200:
+            return None, last.content
+        if last.status_code != 206:
+            return None, None
+        return (
+            "range",
+            first.headers.get("content-range", "").rpartition("/")[2],
+            first.headers.get("etag"),
+            first.headers.get("last-modified"),
+            hashlib.sha256(first.content).hexdigest(),
+            hashlib.sha256(last.content).hexdigest(),
+        ), None
 
-    def _extract_date(self, text: str) -> Optional[date]:
+    @staticmethod
+    def _extract_date(text: str) -> Optional[date]:
         match = re.search(r"\b(\d{1,2}/\d{1,2}/\d{4})\b", text)
         if not match:
             return None
@@ -51,8 +118,24 @@ class PK600MorningCutoutPdfWorker(BaseWorker):
         except ValueError:
             return None
 
-    def _extract_primal_values(self, text: str, report_date: date) -> Dict[str, object]:
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
+    @staticmethod
+    def _primal_fields(rows: List[Dict[str, str]], report_date: date) -> Dict[str, object]:
+        target = report_date.strftime("%m/%d/%Y")
+        for idx, row in enumerate(rows):
+            if row["date"] != target:
+                continue
+            fields: Dict[str, object] = {field: row[field] for field in PRIMAL_TABLE.fields[1:]}
+            change_row = rows[idx + 1] if idx + 1 < len(rows) else None
+            if change_row and change_row["date"] == "Change:":
+                for field in PRIMAL_TABLE.fields[1:]:
+                    if change_row[field]:
+                        fields[f"change_{field}"] = change_row[field]
+            return fields
+        return {}
+
+    @staticmethod
+    def _extract_primal_values(text: str, report_date: date) -> Dict[str, object]:
+        lines = [" ".join(line.split()) for line in text.splitlines() if line.strip()]
         header_idx = None
         for idx, line in enumerate(lines):
             if line.startswith("Date Loads Carcass Loin Butt Pic Rib Ham Belly"):
@@ -121,6 +204,61 @@ class PK600MorningCutoutPdfWorker(BaseWorker):
         return fields
 
 
+def extract_pdf_fields(content: bytes, fallback_date: date) -> Dict[str, object]:
+    """Read the report date, excerpt and primal values from the first page's text.
+
+    The page text comes from pypdfium2, with pdfplumber as a fallback. Only
+    when the primal line cannot be split from that text does the slower
+    coordinate-based engine read the table from every page. Runs in the PDF
+    cpu executor, so it must stay module-level.
+    """
+    text, page_count = "", 0
+    for extract_text in (_pdfium_first_page_text, _pdfplumber_first_page_text):
+        try:
+            text, page_count = extract_text(content)
+            break
+        except Exception:
+            continue
+    report_date = PK600MorningCutoutPdfWorker._extract_date(text) or fallback_date
+    table_fields = PK600MorningCutoutPdfWorker._extract_primal_values(text, report_date)
+    if not table_fields:
+        try:
+            rows = extract_table_rows(content, PRIMAL_TABLE)
+            table_fields = PK600MorningCutoutPdfWorker._primal_fields(rows, report_date)
+        except Exception:
+            table_fields = {}
+    fields: Dict[str, object] = {"report_date": report_date, "text_excerpt": text[:1000], "page_count": page_count}
+    fields.update(table_fields)
+    return fields
+
+
+def _pdfium_first_page_text(content: bytes) -> Tuple[str, int]:
+    pdf = pdfium.PdfDocument(content)
+    try:
+        page_count = len(pdf)
+        if not page_count:
+            return "", 0
+        page = pdf[0]
+        try:
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+    return text.replace("\r\n", "\n"), page_count
+
+
+def _pdfplumber_first_page_text(content: bytes) -> Tuple[str, int]:
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        page_count = len(pdf.pages)
+        text = (pdf.pages[0].extract_text() or "") if pdf.pages else ""
+    return text, page_count
+
+
 def build(email_service, alert_service):
     config = next(r for r in get_reports() if r.report_id == "PK600_MORNING_CUTOUT_PDF")
     return PK600MorningCutoutPdfWorker(config, email_service, alert_service)
@@ -72,7 +72,7 @@ export default function Dashboard() {
                 <td>
                   <span className="pill">{statusForToday(report)}</span>
                 </td>
-                <td>{report.latest_run?.run_started_at || "-"}</td>
+                <td>{report.latest_run?.last_seen_at || report.latest_run?.run_started_at || "-"}</td>
                 <td>{report.latest_run?.report_date || "-"}</td>
               </tr>
             ))}
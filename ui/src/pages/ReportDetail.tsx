@@ -68,7 +68,10 @@ export default function ReportDetail() {
           <tbody>
             {runs.map((run) => (
               <tr key={run.id}>
-                <td>{run.state}</td>
+                <td>
+                  {run.state}
+                  {run.repeat_count > 1 ? ` ×${run.repeat_count}` : ""}
+                </td>
                 <td>{run.report_date || "-"}</td>
                 <td>{run.run_started_at}</td>
                 <td>{run.run_finished_at || "-"}</td>
@@ -53,7 +53,7 @@ export default function Reports() {
               <td>
                 <span className="pill">{report.latest_run?.state || "unknown"}</span>
               </td>
-              <td>{report.latest_run?.run_started_at || "-"}</td>
+              <td>{report.latest_run?.last_seen_at || report.latest_run?.run_started_at || "-"}</td>
               <td>{report.latest_version?.created_at || "-"}</td>
               <td>
                 <button
@@ -15,6 +15,8 @@ export type ReportRun = {
   error_type?: string | null;
   error_message?: string | null;
   payload_hash?: string | null;
+  repeat_count: number;
+  last_seen_at: string | null;
 };
 
 export type ReportVersion = {